@@ -1,100 +1,461 @@
+import json
 import math
 import random
-from config import PLAYER_PIECE, AI_PIECE, EMPTY, WINDOW_LENGTH, COLUMN_COUNT, ROW_COUNT
-from board import (
-    drop_piece,
-    get_next_open_row,
-    winning_move,
-    get_valid_locations,
-    is_terminal_node,
+import time
+import numpy as np
+from config import (
+    PLAYER_PIECE,
+    AI_PIECE,
+    EMPTY,
+    WINDOW_LENGTH,
+    COLUMN_COUNT,
+    ROW_COUNT,
+    AI_MOVE_TIME,
 )
+from bitboard import (
+    BitBoard,
+    CELL_WINDOWS,
+    CENTER_COLUMNS,
+    CENTER_MASK,
+    COLUMN_BITS,
+    COLUMN_HEIGHT,
+    WINDOW_MASKS,
+    ZOBRIST_SIDE,
+    mirror_column,
+    non_losing_moves,
+    possible_moves,
+    to_bitboard,
+    winning_cells,
+)
+from board import WINDOWS
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
 
+WIN_SCORE = 100000000000000
+LOSS_SCORE = -10000000000000
 
-def evaluate_window(window, piece):
+# How many nodes to visit between clock checks
+TIME_CHECK_INTERVAL = 1024
+
+# Columns from the centre outwards; central columns take part in more windows
+CENTER_ORDER = tuple(
+    sorted(range(COLUMN_COUNT), key=lambda c: (abs(c - COLUMN_COUNT // 2), c))
+)
+
+# ORDERED_MOVES[playable] lists the open columns centre-first for that bitmask
+ORDERED_MOVES = tuple(
+    tuple(c for c in CENTER_ORDER if playable >> c & 1)
+    for playable in range(1 << COLUMN_COUNT)
+)
+
+# Ordering priorities that always outrank accumulated history scores
+TT_MOVE_PRIORITY = 1 << 62
+KILLER_PRIORITY = 1 << 61
+
+
+def evaluate_counts(piece_count, opp_count, empty_count):
     score = 0
-    opp_piece = PLAYER_PIECE
-    if piece == PLAYER_PIECE:
-        opp_piece = AI_PIECE
 
-    if window.count(piece) == 4:
+    if piece_count == WINDOW_LENGTH:
         score += 100
-    elif window.count(piece) == 3 and window.count(EMPTY) == 1:
+    elif piece_count == WINDOW_LENGTH - 1 and empty_count == 1:
         score += 5
-    elif window.count(piece) == 2 and window.count(EMPTY) == 2:
+    elif piece_count == WINDOW_LENGTH - 2 and empty_count == 2:
         score += 2
 
-    if window.count(opp_piece) == 3 and window.count(EMPTY) == 1:
+    if opp_count == WINDOW_LENGTH - 1 and empty_count == 1:
         score -= 4
 
     return score
 
 
-def score_position(board, piece):
-    score = 0
-
-    center_array = [int(i) for i in list(board[:, COLUMN_COUNT // 2])]
-    center_count = center_array.count(piece)
-    score += center_count * 3
-
-    for r in range(ROW_COUNT):
-        row_array = [int(i) for i in list(board[r, :])]
-        for c in range(COLUMN_COUNT - 3):
-            window = row_array[c : c + WINDOW_LENGTH]
-            score += evaluate_window(window, piece)
+def evaluate_window(window, piece):
+    opp_piece = PLAYER_PIECE
+    if piece == PLAYER_PIECE:
+        opp_piece = AI_PIECE
 
-    for c in range(COLUMN_COUNT):
-        col_array = [int(i) for i in list(board[:, c])]
-        for r in range(ROW_COUNT - 3):
-            window = col_array[r : r + WINDOW_LENGTH]
-            score += evaluate_window(window, piece)
+    return evaluate_counts(
+        window.count(piece), window.count(opp_piece), window.count(EMPTY)
+    )
+
+
+# WINDOW_SCORES[own][opp] is evaluate_counts for a window with that many pieces
+WINDOW_SCORES = [
+    [
+        evaluate_counts(own, opp, WINDOW_LENGTH - own - opp)
+        if own + opp <= WINDOW_LENGTH
+        else 0
+        for opp in range(WINDOW_LENGTH + 1)
+    ]
+    for own in range(WINDOW_LENGTH + 1)
+]
+
+WINDOW_SCORE_TABLE = np.array(WINDOW_SCORES)
+
+
+class IncrementalEvaluator:
+    def __init__(self, board=None):
+        window_count = len(WINDOW_MASKS)
+        # counts[piece][w] is how many of piece's discs sit in window w;
+        # scores[piece] is score_position(board, piece) for the current board
+        self.counts = [None, [0] * window_count, [0] * window_count]
+        self.scores = [0, 0, 0]
+
+        if board is not None:
+            for piece in (PLAYER_PIECE, AI_PIECE):
+                mask = board.masks[piece]
+                while mask:
+                    low_bit = mask & -mask
+                    self.add(low_bit.bit_length() - 1, piece)
+                    mask ^= low_bit
+
+    def copy(self):
+        evaluator = IncrementalEvaluator()
+        evaluator.counts = [None, self.counts[1][:], self.counts[2][:]]
+        evaluator.scores = self.scores[:]
+        return evaluator
+
+    def add(self, index, piece):
+        opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+        own_counts = self.counts[piece]
+        opp_counts = self.counts[opp_piece]
+        own_score = self.scores[piece]
+        opp_score = self.scores[opp_piece]
+
+        for w in CELL_WINDOWS[index]:
+            own = own_counts[w]
+            opp = opp_counts[w]
+            own_score += WINDOW_SCORES[own + 1][opp] - WINDOW_SCORES[own][opp]
+            opp_score += WINDOW_SCORES[opp][own + 1] - WINDOW_SCORES[opp][own]
+            own_counts[w] = own + 1
+
+        if CENTER_MASK >> index & 1:
+            own_score += 3
+
+        self.scores[piece] = own_score
+        self.scores[opp_piece] = opp_score
+
+    def remove(self, index, piece):
+        opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+        own_counts = self.counts[piece]
+        opp_counts = self.counts[opp_piece]
+        own_score = self.scores[piece]
+        opp_score = self.scores[opp_piece]
+
+        for w in CELL_WINDOWS[index]:
+            own = own_counts[w]
+            opp = opp_counts[w]
+            own_score += WINDOW_SCORES[own - 1][opp] - WINDOW_SCORES[own][opp]
+            opp_score += WINDOW_SCORES[opp][own - 1] - WINDOW_SCORES[opp][own]
+            own_counts[w] = own - 1
+
+        if CENTER_MASK >> index & 1:
+            own_score -= 3
+
+        self.scores[piece] = own_score
+        self.scores[opp_piece] = opp_score
+
+
+def to_evaluated_bitboard(board):
+    board = to_bitboard(board)
+    if board.evaluator is None:
+        board.evaluator = IncrementalEvaluator(board)
+    return board
 
-    for r in range(ROW_COUNT - 3):
-        for c in range(COLUMN_COUNT - 3):
-            window = [board[r + i][c + i] for i in range(WINDOW_LENGTH)]
-            score += evaluate_window(window, piece)
 
-    for r in range(ROW_COUNT - 3):
-        for c in range(COLUMN_COUNT - 3):
-            window = [board[r + 3 - i][c + i] for i in range(WINDOW_LENGTH)]
-            score += evaluate_window(window, piece)
+def score_position(board, piece):
+    if isinstance(board, BitBoard):
+        if board.evaluator is not None:
+            return board.evaluator.scores[piece]
+        return score_bitboard(board, piece)
+
+    # Gather every window at once and score them through the count table
+    cells = np.asarray(board).reshape(-1)[WINDOWS]
+    opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+    piece_counts = (cells == piece).sum(axis=1)
+    opp_counts = (cells == opp_piece).sum(axis=1)
+    center = board[:, CENTER_COLUMNS.start : CENTER_COLUMNS.stop]
+    center_count = int((center == piece).sum())
+    return int(WINDOW_SCORE_TABLE[piece_counts, opp_counts].sum()) + center_count * 3
+
+
+def score_bitboard(board, piece):
+    opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+    own = board.masks[piece]
+    opp = board.masks[opp_piece]
+
+    score = (own & CENTER_MASK).bit_count() * 3
+
+    for window in WINDOW_MASKS:
+        piece_count = (own & window).bit_count()
+        opp_count = (opp & window).bit_count()
+        score += evaluate_counts(
+            piece_count, opp_count, WINDOW_LENGTH - piece_count - opp_count
+        )
 
     return score
 
 
-def minimax(board, depth, alpha, beta, maximizingPlayer):
-    valid_locations = get_valid_locations(board)
-    is_terminal = is_terminal_node(board, PLAYER_PIECE, AI_PIECE)
+def score_position_batch(boards, piece):
+    # score_position for a stack of shape (N, ROW_COUNT, COLUMN_COUNT)
+    boards = np.asarray(boards)
+    opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+    cells = boards.reshape(len(boards), ROW_COUNT * COLUMN_COUNT)[:, WINDOWS]
+
+    piece_counts = (cells == piece).sum(axis=2)
+    opp_counts = (cells == opp_piece).sum(axis=2)
+    scores = WINDOW_SCORE_TABLE[piece_counts, opp_counts].sum(axis=1)
+    center = boards[:, :, CENTER_COLUMNS.start : CENTER_COLUMNS.stop]
+    scores += (center == piece).sum(axis=(1, 2)) * 3
+    return scores
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchStats:
+    def __init__(self):
+        self.nodes = 0
+        self.leaves = 0
+        # cutoffs[n] counts cutoffs at nodes with n discs on the board; root_ply
+        # is the disc count at the root, so plies are counted from there
+        self.cutoffs = [0] * (ROW_COUNT * COLUMN_COUNT + 1)
+        self.root_ply = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        # One (depth, seconds, nodes) row per completed iteration
+        self.depths = []
+        self.elapsed = 0.0
+
+    def merge(self, other):
+        # Add the counters of a search over part of the same tree, such as a
+        # parallel worker's share; timings stay those of this search
+        self.nodes += other.nodes
+        self.leaves += other.leaves
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+        for ply, count in enumerate(other.cutoffs):
+            self.cutoffs[ply] += count
+
+    def cutoffs_by_ply(self):
+        cutoffs = self.cutoffs[self.root_ply :]
+        while cutoffs and cutoffs[-1] == 0:
+            cutoffs.pop()
+        return cutoffs
+
+    def effective_branching_factor(self):
+        # Growth in nodes between the last two completed iterations
+        if len(self.depths) < 2 or self.depths[-2][2] == 0:
+            return None
+        return self.depths[-1][2] / self.depths[-2][2]
+
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else None
+
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else None
+
+    def to_dict(self):
+        return {
+            "nodes": self.nodes,
+            "leaves": self.leaves,
+            "cutoffs_by_ply": self.cutoffs_by_ply(),
+            "ebf": self.effective_branching_factor(),
+            "tt_hit_rate": self.tt_hit_rate(),
+            "depths": [
+                {"depth": depth, "seconds": seconds, "nodes": nodes}
+                for depth, seconds, nodes in self.depths
+            ],
+            "elapsed": self.elapsed,
+            "nps": self.nodes_per_second(),
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+
+class SearchContext:
+    def __init__(
+        self, tt=None, deadline=None, use_ordering=True, stop_event=None, stats=None
+    ):
+        self.tt = tt
+        self.deadline = deadline
+        # Set from another thread to abandon the search early
+        self.stop_event = stop_event
+        self.use_ordering = use_ordering
+        self.stats = stats if stats is not None else SearchStats()
+        # One killer slot per ply, indexed by the number of discs on the board
+        self.killers = [None] * (ROW_COUNT * COLUMN_COUNT + 1)
+        # history[piece][cell] accumulates depth**2 for every cutoff a drop
+        # into that cell caused, across the whole search
+        self.history = [None] + [[0] * len(CELL_WINDOWS) for _ in range(2)]
+
+    def check_time(self):
+        self.stats.nodes += 1
+        if self.stats.nodes % TIME_CHECK_INTERVAL == 0:
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchTimeout()
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+
+    def order_moves(self, board, valid_locations, tt_move, piece):
+        if not self.use_ordering:
+            # Plain left-to-right order, kept as a baseline for node counts
+            valid_locations.sort()
+            return valid_locations
+
+        killer = self.killers[board.move_count]
+        history = self.history[piece]
+        heights = board.heights
+
+        def priority(col):
+            if col == tt_move:
+                return TT_MOVE_PRIORITY
+            if col == killer:
+                return KILLER_PRIORITY
+            return history[col * COLUMN_HEIGHT + heights[col]]
+
+        # valid_locations is already centre-first, and the sort is stable, so
+        # centre order breaks ties between equal history scores. Sorting in
+        # place keeps the node from allocating a second list
+        valid_locations.sort(key=priority, reverse=True)
+        return valid_locations
+
+    def record_cutoff(self, board, col, piece, depth):
+        self.stats.cutoffs[board.move_count] += 1
+        self.killers[board.move_count] = col
+        self.history[piece][col * COLUMN_HEIGHT + board.heights[col]] += depth * depth
+
+
+def get_ordered_moves(board):
+    return list(ORDERED_MOVES[board.playable])
+
+
+def get_threat_moves(board, piece):
+    # Returns (winning column, moves). With no immediate win, moves holds the
+    # centre-first columns that do not hand the opponent a win next turn; it is
+    # empty when the opponent has a double threat or every move plays under one
+    current = board.masks[piece]
+    mask = board.masks[PLAYER_PIECE] | board.masks[AI_PIECE]
+    wins = winning_cells(current, mask) & possible_moves(mask)
+    if wins:
+        return ((wins & -wins).bit_length() - 1) // COLUMN_HEIGHT, None
+
+    moves = non_losing_moves(current, mask)
+    return None, [c for c in ORDERED_MOVES[board.playable] if moves & COLUMN_BITS[c]]
+
+
+def get_tt_key(board, maximizingPlayer):
+    # A position and its mirror image share one entry; moves are stored for
+    # the canonical orientation, so mirrored is needed to read them back.
+    # The same cells can be reached with either side to move, so the side is
+    # part of the key
+    key, mirrored = board.canonical_hash()
+    return (key ^ ZOBRIST_SIDE if maximizingPlayer else key), mirrored
+
+
+def minimax(board, depth, alpha, beta, maximizingPlayer, context=None):
+    board = to_evaluated_bitboard(board)
+    if context is not None:
+        context.check_time()
+
+    winner = board.winner()
+    is_terminal = winner != EMPTY or board.is_full()
 
     if depth == 0 or is_terminal:
-        return get_terminal_score(board, is_terminal)
+        if context is not None:
+            context.stats.leaves += 1
+        return get_terminal_score(board, is_terminal, winner)
+
+    # Immediate wins and forced blocks are settled before any searching, so
+    # one-move tactics are never lost past the depth cap
+    piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+    winning_column, valid_locations = get_threat_moves(board, piece)
+    if winning_column is not None:
+        return winning_column, WIN_SCORE if maximizingPlayer else LOSS_SCORE
+    if not valid_locations:
+        return (
+            get_ordered_moves(board)[0],
+            LOSS_SCORE if maximizingPlayer else WIN_SCORE,
+        )
+
+    if context is None:
+        if maximizingPlayer:
+            return maximize_score(board, depth, alpha, beta, valid_locations)
+        else:
+            return minimize_score(board, depth, alpha, beta, valid_locations)
+
+    tt = context.tt
+    tt_move = None
+    alpha_orig, beta_orig = alpha, beta
+
+    if tt is not None:
+        key, mirrored = get_tt_key(board, maximizingPlayer)
+
+        entry = tt.probe(key)
+        context.stats.tt_probes += 1
+        if entry is not None:
+            context.stats.tt_hits += 1
+            _, entry_depth, entry_value, entry_flag, tt_move, _ = entry
+            if mirrored and tt_move is not None:
+                tt_move = mirror_column(tt_move)
+            if entry_depth >= depth:
+                if entry_flag == EXACT:
+                    return tt_move, entry_value
+                elif entry_flag == LOWER_BOUND:
+                    alpha = max(alpha, entry_value)
+                elif entry_flag == UPPER_BOUND:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return tt_move, entry_value
+
+    # The stored best move goes first. Under iterative deepening this is how
+    # the previous iteration's principal variation gets replayed first
+    valid_locations = context.order_moves(board, valid_locations, tt_move, piece)
 
     if maximizingPlayer:
-        return maximize_score(board, depth, alpha, beta, valid_locations)
+        column, value = maximize_score(
+            board, depth, alpha, beta, valid_locations, context
+        )
     else:
-        return minimize_score(board, depth, alpha, beta, valid_locations)
+        column, value = minimize_score(
+            board, depth, alpha, beta, valid_locations, context
+        )
+
+    if tt is not None:
+        if value <= alpha_orig:
+            flag = UPPER_BOUND
+        elif value >= beta_orig:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        tt.store(
+            key, depth, value, flag, mirror_column(column) if mirrored else column
+        )
+
+    return column, value
 
 
-def get_terminal_score(board, is_terminal):
+def get_terminal_score(board, is_terminal, winner=EMPTY):
     if is_terminal:
-        if winning_move(board, AI_PIECE):
-            return (None, 100000000000000)
-        elif winning_move(board, PLAYER_PIECE):
-            return (None, -10000000000000)
+        if winner == AI_PIECE:
+            return (None, WIN_SCORE)
+        elif winner == PLAYER_PIECE:
+            return (None, LOSS_SCORE)
         else:
             return (None, 0)
     else:
         return (None, score_position(board, AI_PIECE))
 
 
-def maximize_score(board, depth, alpha, beta, valid_locations):
+def maximize_score(board, depth, alpha, beta, valid_locations, context=None):
     value = -math.inf
-    column = random.choice(valid_locations)
+    column = valid_locations[0]
 
     for col in valid_locations:
-        row = get_next_open_row(board, col)
-        b_copy = board.copy()
-        drop_piece(b_copy, row, col, AI_PIECE)
-        new_score = minimax(b_copy, depth - 1, alpha, beta, False)[1]
+        board.play(col, AI_PIECE)
+        new_score = minimax(board, depth - 1, alpha, beta, False, context)[1]
+        board.undo()
 
         if new_score > value:
             value = new_score
@@ -102,20 +463,21 @@ def maximize_score(board, depth, alpha, beta, valid_locations):
 
         alpha = max(alpha, value)
         if alpha >= beta:
+            if context is not None:
+                context.record_cutoff(board, col, AI_PIECE, depth)
             break
 
     return column, value
 
 
-def minimize_score(board, depth, alpha, beta, valid_locations):
+def minimize_score(board, depth, alpha, beta, valid_locations, context=None):
     value = math.inf
-    column = random.choice(valid_locations)
+    column = valid_locations[0]
 
     for col in valid_locations:
-        row = get_next_open_row(board, col)
-        b_copy = board.copy()
-        drop_piece(b_copy, row, col, PLAYER_PIECE)
-        new_score = minimax(b_copy, depth - 1, alpha, beta, True)[1]
+        board.play(col, PLAYER_PIECE)
+        new_score = minimax(board, depth - 1, alpha, beta, True, context)[1]
+        board.undo()
 
         if new_score < value:
             value = new_score
@@ -123,20 +485,117 @@ def minimize_score(board, depth, alpha, beta, valid_locations):
 
         beta = min(beta, value)
         if alpha >= beta:
+            if context is not None:
+                context.record_cutoff(board, col, PLAYER_PIECE, depth)
             break
 
     return column, value
 
 
+def get_move_budget(difficulty, remaining_time, moves_left):
+    budget = AI_MOVE_TIME[difficulty]
+    if not math.isinf(remaining_time):
+        budget = min(budget, remaining_time / max(1, moves_left))
+    return budget
+
+
+def get_principal_variation(board, tt, maximizingPlayer=True):
+    board = to_bitboard(board)
+    pv = []
+    seen = set()
+    while True:
+        key, mirrored = get_tt_key(board, maximizingPlayer)
+        entry = tt.probe(key)
+        if entry is None or entry[4] is None or key in seen:
+            break
+        move = mirror_column(entry[4]) if mirrored else entry[4]
+        if not board.can_play(move):
+            break
+        seen.add(key)
+        pv.append(move)
+        board.play(move, AI_PIECE if maximizingPlayer else PLAYER_PIECE)
+        maximizingPlayer = not maximizingPlayer
+        if board.is_win(PLAYER_PIECE) or board.is_win(AI_PIECE):
+            break
+    for _ in pv:
+        board.undo()
+    return pv
+
+
+def iterative_deepening(
+    board,
+    time_budget,
+    tt=None,
+    max_depth=None,
+    stop_event=None,
+    maximizingPlayer=True,
+    stats=None,
+    search=None,
+):
+    # Pass a SearchStats as stats to get the search's statistics back. search
+    # replaces minimax for each iteration's root search; it takes the same
+    # arguments, as parallel.ParallelSearch.search_root does
+    if search is None:
+        search = minimax
+    board = to_evaluated_bitboard(board)
+    if tt is None:
+        tt = TranspositionTable()
+    tt.new_search()
+
+    if max_depth is None:
+        max_depth = ROW_COUNT * COLUMN_COUNT - board.move_count
+    max_depth = max(1, max_depth)
+
+    start = time.perf_counter()
+    deadline = start + time_budget
+    # Depth 1 always runs to completion so there is a move to return, unless
+    # the search is stopped outright
+    context = SearchContext(tt, stop_event=stop_event, stats=stats)
+    stats = context.stats
+    stats.root_ply = board.move_count
+    history_length = len(board.history)
+    best_move, best_value, completed_depth = None, 0, 0
+
+    for depth in range(1, max_depth + 1):
+        iteration_start, iteration_nodes = time.perf_counter(), stats.nodes
+        try:
+            best_move, best_value = search(
+                board, depth, -math.inf, math.inf, maximizingPlayer, context
+            )
+        except SearchTimeout:
+            # Unwind the moves the interrupted iteration left on the board
+            while len(board.history) > history_length:
+                board.undo()
+            break
+        finally:
+            stats.elapsed = time.perf_counter() - start
+
+        stats.depths.append(
+            (
+                depth,
+                time.perf_counter() - iteration_start,
+                stats.nodes - iteration_nodes,
+            )
+        )
+        completed_depth = depth
+        context.deadline = deadline
+        if best_value >= WIN_SCORE or best_value <= LOSS_SCORE:
+            break
+        if time.perf_counter() > deadline:
+            break
+
+    return best_move, best_value, completed_depth
+
+
 def pick_best_move(board, piece):
-    valid_locations = get_valid_locations(board)
+    board = to_evaluated_bitboard(board)
+    valid_locations = board.valid_moves()
     best_score = -10000
     best_col = random.choice(valid_locations)
     for col in valid_locations:
-        row = get_next_open_row(board, col)
-        temp_board = board.copy()
-        drop_piece(temp_board, row, col, piece)
-        score = score_position(temp_board, piece)
+        board.play(col, piece)
+        score = score_position(board, piece)
+        board.undo()
         if score > best_score:
             best_score = score
             best_col = col
@@ -0,0 +1,196 @@
+import argparse
+import json
+import sys
+import timeit
+from config import PLAYER_PIECE, AI_PIECE, BENCHMARK_BASELINE_PATH, BENCHMARK_THRESHOLD
+from ai import SearchStats, evaluate_window, iterative_deepening, score_position
+from bitboard import BitBoard
+from board import get_valid_locations, winning_move
+from transposition import TranspositionTable
+
+# Columns in play order; every position ends with the AI to move
+POSITIONS = {
+    "opening": ["", "3", "33", "3324"],
+    "middlegame": [
+        "5461032104655",
+        "4000114063234614",
+        "0522614200460306",
+        "300650110335",
+    ],
+    # The human threatens to win next move
+    "tactical": [
+        "0036315413415",
+        "35303310266420",
+        "14303540644251543",
+        "1442662205561631245263",
+    ],
+    "endgame": [
+        "20336055020112343265415526204460",
+        "24601016344106416510246401320523623",
+        "034011012165602436525011054654645222",
+        "02235444653613602035420635413224566",
+    ],
+}
+
+# Near-full boards have few moves left, so they are searched deeper
+SEARCH_DEPTHS = {"opening": 9, "middlegame": 9, "tactical": 12, "endgame": 20}
+
+SAMPLE_WINDOWS = [
+    [AI_PIECE, AI_PIECE, AI_PIECE, AI_PIECE],
+    [AI_PIECE, AI_PIECE, AI_PIECE, 0],
+    [AI_PIECE, AI_PIECE, 0, 0],
+    [PLAYER_PIECE, PLAYER_PIECE, PLAYER_PIECE, 0],
+    [AI_PIECE, PLAYER_PIECE, 0, 0],
+    [0, 0, 0, 0],
+]
+
+# Metrics where a larger number is better; for the rest smaller is better
+HIGHER_IS_BETTER = {"nps"}
+
+
+def load_position(moves):
+    board = BitBoard()
+    piece = PLAYER_PIECE if len(moves) % 2 else AI_PIECE
+    for col in moves:
+        board.play(int(col), piece)
+        piece = AI_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE
+    return board
+
+
+def time_calls(function, calls, number, repeat):
+    # Best of repeat runs, in nanoseconds per call
+    timer = timeit.Timer(lambda: [function(*args) for args in calls])
+    best = min(timer.repeat(repeat, number))
+    return best / (number * len(calls)) * 1e9
+
+
+def benchmark_primitives(number, repeat):
+    arrays = [
+        load_position(moves).to_array()
+        for group in POSITIONS.values()
+        for moves in group
+    ]
+    cases = {
+        "winning_move": (winning_move, [(a, PLAYER_PIECE) for a in arrays]),
+        "get_valid_locations": (get_valid_locations, [(a,) for a in arrays]),
+        "score_position": (score_position, [(a, AI_PIECE) for a in arrays]),
+        "evaluate_window": (
+            evaluate_window,
+            [(window, AI_PIECE) for window in SAMPLE_WINDOWS],
+        ),
+    }
+    return {
+        name: {"ns_per_call": time_calls(function, calls, number, repeat)}
+        for name, (function, calls) in cases.items()
+    }
+
+
+def search_position(moves, depth):
+    stats = SearchStats()
+    iterative_deepening(
+        load_position(moves),
+        float("inf"),
+        TranspositionTable(),
+        max_depth=depth,
+        stats=stats,
+    )
+    return stats
+
+
+def benchmark_search(repeat):
+    results = {}
+    for group, positions in POSITIONS.items():
+        depth = SEARCH_DEPTHS[group]
+        seconds, nodes = 0.0, 0
+        for moves in positions:
+            # Node counts are deterministic; the time is the best of repeat runs
+            runs = [search_position(moves, depth) for _ in range(repeat)]
+            seconds += min(stats.elapsed for stats in runs)
+            nodes += runs[0].nodes
+        results[group] = {
+            "depth": depth,
+            "seconds": seconds,
+            "nodes": nodes,
+            "nps": nodes / seconds,
+        }
+    return results
+
+
+def run_benchmarks(number=200, repeat=5):
+    return {
+        "primitives": benchmark_primitives(number, repeat),
+        "search": benchmark_search(repeat),
+    }
+
+
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for section, cases in results.items():
+        for name, metrics in cases.items():
+            reference = baseline.get(section, {}).get(name, {})
+            for metric, value in metrics.items():
+                if metric == "depth" or metric not in reference:
+                    continue
+                # A change of search depth makes the numbers incomparable
+                if metrics.get("depth") != reference.get("depth"):
+                    continue
+                before = reference[metric]
+                if metric in HIGHER_IS_BETTER:
+                    change = before / value - 1 if value else float("inf")
+                else:
+                    change = value / before - 1 if before else 0.0
+                if change > threshold:
+                    regressions.append((f"{section}.{name}.{metric}", before, value))
+    return regressions
+
+
+def print_results(results, baseline):
+    print(f"{'benchmark':<32} {'metric':<12} {'baseline':>14} {'current':>14}")
+    for section, cases in results.items():
+        for name, metrics in cases.items():
+            reference = baseline.get(section, {}).get(name, {})
+            for metric, value in metrics.items():
+                before = reference.get(metric)
+                before = f"{before:>14.3f}" if before is not None else f"{'-':>14}"
+                label = f"{section}.{name}"
+                print(f"{label:<32} {metric:<12} {before} {value:>14.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Connect 4 engine")
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=BENCHMARK_THRESHOLD)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--save", action="store_true", help="store this run as the new baseline"
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.number, args.repeat)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+        print_results(results, {})
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        baseline = {}
+        print(f"No baseline at {args.baseline}; run with --save to create one")
+
+    print_results(results, baseline)
+    regressions = find_regressions(results, baseline, args.threshold)
+    for name, before, after in regressions:
+        print(f"REGRESSION {name}: {before:.3f} -> {after:.3f}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
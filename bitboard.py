@@ -0,0 +1,349 @@
+import random
+import numpy as np
+from board import WINDOWS
+from config import (
+    ROW_COUNT,
+    COLUMN_COUNT,
+    WINDOW_LENGTH,
+    EMPTY,
+    PLAYER_PIECE,
+    AI_PIECE,
+)
+
+# Each column uses ROW_COUNT bits plus one sentinel bit on top, so shifted
+# masks never wrap from the top of one column into the bottom of the next.
+COLUMN_HEIGHT = ROW_COUNT + 1
+
+COLUMN_MASK = (1 << COLUMN_HEIGHT) - 1
+BOTTOM_MASK = sum(1 << (c * COLUMN_HEIGHT) for c in range(COLUMN_COUNT))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROW_COUNT) - 1)
+# The middle column, or both middle columns on an even-width board, so the
+# centre bonus scores a position and its mirror image alike
+CENTER_COLUMNS = range((COLUMN_COUNT - 1) // 2, COLUMN_COUNT // 2 + 1)
+CENTER_MASK = sum(((1 << ROW_COUNT) - 1) << (c * COLUMN_HEIGHT) for c in CENTER_COLUMNS)
+
+# Vertical, horizontal and the two diagonal directions
+DIRECTIONS = (1, COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1)
+
+
+def _run_steps(length):
+    # Shift multiples that leave a bit only where a run of length cells starts:
+    # each step doubles the run, and the last one tops it up to length
+    steps = []
+    run = 1
+    while run * 2 <= length:
+        steps.append(run)
+        run *= 2
+    if run < length:
+        steps.append(length - run)
+    return steps
+
+
+# WIN_STEPS[d] are the shifts is_win applies for direction d; two per
+# direction for four in a row
+WIN_STEPS = tuple(
+    tuple(step * shift for step in _run_steps(WINDOW_LENGTH)) for shift in DIRECTIONS
+)
+
+
+def bit_index(row, col):
+    return col * COLUMN_HEIGHT + row
+
+
+def mirror_column(col):
+    return COLUMN_COUNT - 1 - col
+
+
+def mirror_bits(bits):
+    # Reflect a column-major bit layout left to right
+    mirrored = 0
+    for c in range(COLUMN_COUNT):
+        column = (bits >> (c * COLUMN_HEIGHT)) & COLUMN_MASK
+        mirrored |= column << ((COLUMN_COUNT - 1 - c) * COLUMN_HEIGHT)
+    return mirrored
+
+
+def _build_zobrist_keys():
+    # Fixed seed so hashes are stable across runs and processes
+    rng = random.Random(0x5EED)
+    keys = [[0] * (COLUMN_COUNT * COLUMN_HEIGHT) for _ in range(3)]
+    for piece in (PLAYER_PIECE, AI_PIECE):
+        for i in range(COLUMN_COUNT * COLUMN_HEIGHT):
+            keys[piece][i] = rng.getrandbits(64)
+    return keys, rng.getrandbits(64)
+
+
+ZOBRIST_KEYS, ZOBRIST_SIDE = _build_zobrist_keys()
+
+# MIRROR_ZOBRIST_KEYS[piece][i] is the key of the cell mirroring bit i, so the
+# hash of the mirrored position can be kept alongside the real one
+MIRROR_ZOBRIST_KEYS = [
+    [
+        keys[mirror_column(i // COLUMN_HEIGHT) * COLUMN_HEIGHT + i % COLUMN_HEIGHT]
+        for i in range(COLUMN_COUNT * COLUMN_HEIGHT)
+    ]
+    for keys in ZOBRIST_KEYS
+]
+
+# Every window of board.WINDOWS as a bitmask, in the same order
+WINDOW_MASKS = tuple(
+    sum(1 << bit_index(*divmod(i, COLUMN_COUNT)) for i in window)
+    for window in WINDOWS.tolist()
+)
+
+# position_key packs a position into COLUMN_COUNT * COLUMN_HEIGHT bits, which
+# fits one unsigned 64-bit word on the standard board. Python integers have no
+# fixed width, so larger boards simply use longer keys
+POSITION_KEY_BYTES = max(8, -(-COLUMN_COUNT * COLUMN_HEIGHT // 8))
+
+# Bit c is set while column c still has room
+FULL_PLAYABLE = (1 << COLUMN_COUNT) - 1
+
+# VALID_MOVES[playable] lists the open columns left to right for that bitmask
+VALID_MOVES = tuple(
+    tuple(c for c in range(COLUMN_COUNT) if playable >> c & 1)
+    for playable in range(1 << COLUMN_COUNT)
+)
+
+# CELL_WINDOWS[bit_index(r, c)] lists the windows passing through that cell
+CELL_WINDOWS = tuple(
+    tuple(w for w, window in enumerate(WINDOW_MASKS) if window >> i & 1)
+    for i in range(COLUMN_COUNT * COLUMN_HEIGHT)
+)
+
+COLUMN_BITS = tuple(
+    ((1 << ROW_COUNT) - 1) << (c * COLUMN_HEIGHT) for c in range(COLUMN_COUNT)
+)
+
+
+def _winning_cells_four(position, mask):
+    # winning_cells unrolled for the standard four in a row
+    # vertical
+    cells = (position << 1) & (position << 2) & (position << 3)
+
+    for shift in (COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1):
+        pair = (position << shift) & (position << (2 * shift))
+        cells |= pair & (position << (3 * shift))
+        cells |= pair & (position >> shift)
+        pair = (position >> shift) & (position >> (2 * shift))
+        cells |= pair & (position << shift)
+        cells |= pair & (position >> (3 * shift))
+
+    return cells & (BOARD_MASK ^ mask)
+
+
+def _winning_cells_any(position, mask):
+    # below[j] marks cells with j of our stones straight below them along the
+    # direction, above[j] the same on the other side; a cell with k below and
+    # WINDOW_LENGTH - 1 - k above completes a line
+    needed = WINDOW_LENGTH - 1
+    # vertical
+    cells = position
+    for i in range(1, needed):
+        cells &= position << i
+    cells <<= 1
+
+    for shift in (COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1):
+        below = [-1]
+        above = [-1]
+        for i in range(1, WINDOW_LENGTH):
+            below.append(below[-1] & (position << (i * shift)))
+            above.append(above[-1] & (position >> (i * shift)))
+        for k in range(WINDOW_LENGTH):
+            cells |= below[k] & above[needed - k]
+
+    return cells & (BOARD_MASK ^ mask)
+
+
+# Empty cells that would complete a line for the stones in position
+winning_cells = _winning_cells_four if WINDOW_LENGTH == 4 else _winning_cells_any
+
+
+def possible_moves(mask):
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+
+def can_win_next(current, mask):
+    return winning_cells(current, mask) & possible_moves(mask) != 0
+
+
+def non_losing_moves(current, mask):
+    possible = possible_moves(mask)
+    opponent_wins = winning_cells(current ^ mask, mask)
+    forced = possible & opponent_wins
+    if forced:
+        # Two immediate threats cannot both be blocked
+        if forced & (forced - 1):
+            return 0
+        possible = forced
+    # Never play directly below a cell the opponent needs
+    return possible & ~(opponent_wins >> 1)
+
+
+class BitBoard:
+    def __init__(self):
+        # masks[piece] holds the cells owned by that piece; index 0 (EMPTY) is unused
+        self.masks = [0, 0, 0]
+        self.heights = [0] * COLUMN_COUNT
+        self.playable = FULL_PLAYABLE
+        self.move_count = 0
+        self.history = []
+        self.hash = 0
+        self.mirror_hash = 0
+        # Optional incremental evaluator kept in step with play/undo
+        self.evaluator = None
+
+    @classmethod
+    def from_array(cls, board):
+        bitboard = cls()
+        for c in range(COLUMN_COUNT):
+            for r in range(ROW_COUNT):
+                piece = int(board[r][c])
+                if piece != EMPTY:
+                    bitboard._put(c, piece)
+        return bitboard
+
+    @classmethod
+    def from_key(cls, key):
+        # Inverse of position_key: each column holds the AI's discs with a
+        # marker bit just above the top disc
+        bitboard = cls()
+        for c in range(COLUMN_COUNT):
+            column = key >> (c * COLUMN_HEIGHT) & COLUMN_MASK
+            for r in range(column.bit_length() - 1):
+                bitboard._put(c, AI_PIECE if column >> r & 1 else PLAYER_PIECE)
+        return bitboard
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls.from_key(int.from_bytes(data, "little"))
+
+    def to_bytes(self):
+        return self.position_key().to_bytes(POSITION_KEY_BYTES, "little")
+
+    def _put(self, col, piece):
+        # Stack a disc without recording a move, for building a position
+        index = col * COLUMN_HEIGHT + self.heights[col]
+        self.masks[piece] |= 1 << index
+        self.hash ^= ZOBRIST_KEYS[piece][index]
+        self.mirror_hash ^= MIRROR_ZOBRIST_KEYS[piece][index]
+        self.heights[col] += 1
+        self.move_count += 1
+        if self.heights[col] == ROW_COUNT:
+            self.playable &= ~(1 << col)
+
+    def to_array(self):
+        board = np.zeros((ROW_COUNT, COLUMN_COUNT), dtype=np.int8)
+        for c in range(COLUMN_COUNT):
+            for r in range(self.heights[c]):
+                bit = 1 << bit_index(r, c)
+                board[r][c] = (
+                    PLAYER_PIECE if self.masks[PLAYER_PIECE] & bit else AI_PIECE
+                )
+        return board
+
+    def copy(self):
+        bitboard = BitBoard()
+        bitboard.masks = self.masks[:]
+        bitboard.heights = self.heights[:]
+        bitboard.playable = self.playable
+        bitboard.move_count = self.move_count
+        bitboard.history = self.history[:]
+        bitboard.hash = self.hash
+        bitboard.mirror_hash = self.mirror_hash
+        if self.evaluator is not None:
+            bitboard.evaluator = self.evaluator.copy()
+        return bitboard
+
+    def can_play(self, col):
+        return self.playable >> col & 1 == 1
+
+    def valid_moves(self):
+        return list(VALID_MOVES[self.playable])
+
+    def is_full(self):
+        return self.playable == 0
+
+    def play(self, col, piece):
+        row = self.heights[col]
+        index = col * COLUMN_HEIGHT + row
+        self.masks[piece] |= 1 << index
+        self.hash ^= ZOBRIST_KEYS[piece][index]
+        self.mirror_hash ^= MIRROR_ZOBRIST_KEYS[piece][index]
+        if self.evaluator is not None:
+            self.evaluator.add(index, piece)
+        self.heights[col] = row + 1
+        if row + 1 == ROW_COUNT:
+            self.playable &= ~(1 << col)
+        self.move_count += 1
+        self.history.append(col)
+        return row
+
+    def undo(self):
+        col = self.history.pop()
+        row = self.heights[col] - 1
+        index = col * COLUMN_HEIGHT + row
+        bit = 1 << index
+        piece = PLAYER_PIECE if self.masks[PLAYER_PIECE] & bit else AI_PIECE
+        self.masks[piece] ^= bit
+        self.hash ^= ZOBRIST_KEYS[piece][index]
+        self.mirror_hash ^= MIRROR_ZOBRIST_KEYS[piece][index]
+        if self.evaluator is not None:
+            self.evaluator.remove(index, piece)
+        self.heights[col] = row
+        self.playable |= 1 << col
+        self.move_count -= 1
+        return row, col, piece
+
+    def position_key(self):
+        # Occupancy plus the bottom row marks each column's first empty cell,
+        # so adding the AI's cells gives a unique key for the position
+        return (
+            self.masks[AI_PIECE]
+            + (self.masks[PLAYER_PIECE] | self.masks[AI_PIECE])
+            + BOTTOM_MASK
+        )
+
+    def canonical_key(self):
+        # The smaller of the key and its mirror image, plus whether the
+        # mirror was chosen, so mirrored positions share one entry
+        key = self.position_key()
+        mirrored = mirror_bits(key)
+        if mirrored < key:
+            return mirrored, True
+        return key, False
+
+    def winner(self):
+        # Only the side that moved last can have just completed a line. A board
+        # built from an array has no last move, so both sides are checked
+        if not self.history:
+            for piece in (PLAYER_PIECE, AI_PIECE):
+                if self.is_win(piece):
+                    return piece
+            return EMPTY
+        col = self.history[-1]
+        bit = 1 << (col * COLUMN_HEIGHT + self.heights[col] - 1)
+        piece = PLAYER_PIECE if self.masks[PLAYER_PIECE] & bit else AI_PIECE
+        return piece if self.is_win(piece) else EMPTY
+
+    def canonical_hash(self):
+        # Like canonical_key, but from the Zobrist hashes kept in play/undo
+        if self.mirror_hash < self.hash:
+            return self.mirror_hash, True
+        return self.hash, False
+
+    def is_win(self, piece):
+        mask = self.masks[piece]
+        for steps in WIN_STEPS:
+            run = mask
+            for step in steps:
+                run &= run >> step
+            if run:
+                return True
+        return False
+
+
+def to_bitboard(board):
+    if isinstance(board, BitBoard):
+        return board
+    return BitBoard.from_array(board)
@@ -1,9 +1,42 @@
 import numpy as np
-from config import ROW_COUNT, COLUMN_COUNT
+from config import ROW_COUNT, COLUMN_COUNT, WINDOW_LENGTH, EMPTY
+
+
+def _build_windows():
+    # Flat cell indices (r * COLUMN_COUNT + c) of every WINDOW_LENGTH window, in
+    # the order score_position walks them: rows, columns, then both diagonals
+    windows = []
+    for r in range(ROW_COUNT):
+        for c in range(COLUMN_COUNT - WINDOW_LENGTH + 1):
+            windows.append([(r, c + i) for i in range(WINDOW_LENGTH)])
+    for c in range(COLUMN_COUNT):
+        for r in range(ROW_COUNT - WINDOW_LENGTH + 1):
+            windows.append([(r + i, c) for i in range(WINDOW_LENGTH)])
+    for r in range(ROW_COUNT - WINDOW_LENGTH + 1):
+        for c in range(COLUMN_COUNT - WINDOW_LENGTH + 1):
+            windows.append([(r + i, c + i) for i in range(WINDOW_LENGTH)])
+    for r in range(ROW_COUNT - WINDOW_LENGTH + 1):
+        for c in range(COLUMN_COUNT - WINDOW_LENGTH + 1):
+            windows.append(
+                [(r + WINDOW_LENGTH - 1 - i, c + i) for i in range(WINDOW_LENGTH)]
+            )
+    return np.array(
+        [[r * COLUMN_COUNT + c for r, c in window] for window in windows],
+        dtype=np.intp,
+    )
+
+
+WINDOWS = _build_windows()
+
+# WINDOWS_BY_CELL[r * COLUMN_COUNT + c] lists the rows of WINDOWS through that cell
+WINDOWS_BY_CELL = tuple(
+    np.flatnonzero((WINDOWS == i).any(axis=1)) for i in range(ROW_COUNT * COLUMN_COUNT)
+)
 
 
 def create_board():
-    board = np.zeros((ROW_COUNT, COLUMN_COUNT))
+    # Cells only ever hold EMPTY, PLAYER_PIECE or AI_PIECE
+    board = np.zeros((ROW_COUNT, COLUMN_COUNT), dtype=np.int8)
     return board
 
 
@@ -16,10 +49,28 @@ def is_valid_location(board, col):
 
 
 def get_next_open_row(board, col):
-    for r in range(ROW_COUNT):
-        if board[r][col] == 0:
-            return r
-    return None
+    # Pieces stack from row 0, so the filled count is the next open row
+    row = int(np.count_nonzero(board[:, col]))
+    return row if row < ROW_COUNT else None
+
+
+def get_column_heights(board):
+    return [int(np.count_nonzero(board[:, c])) for c in range(COLUMN_COUNT)]
+
+
+def make_move(board, heights, col, piece):
+    # In-place drop using the tracked column height instead of a row scan
+    row = heights[col]
+    board[row][col] = piece
+    heights[col] = row + 1
+    return row
+
+
+def unmake_move(board, heights, col):
+    row = heights[col] - 1
+    board[row][col] = EMPTY
+    heights[col] = row
+    return row
 
 
 def print_board(board):
@@ -27,60 +78,48 @@ def print_board(board):
 
 
 def winning_move(board, piece):
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT):
-            if (
-                board[r][c] == piece
-                and board[r][c + 1] == piece
-                and board[r][c + 2] == piece
-                and board[r][c + 3] == piece
-            ):
-                return True
+    cells = np.asarray(board).reshape(-1)[WINDOWS]
+    return bool((cells == piece).all(axis=1).any())
 
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT - 3):
-            if (
-                board[r][c] == piece
-                and board[r + 1][c] == piece
-                and board[r + 2][c] == piece
-                and board[r + 3][c] == piece
-            ):
-                return True
-
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT - 3):
-            if (
-                board[r][c] == piece
-                and board[r + 1][c + 1] == piece
-                and board[r + 2][c + 2] == piece
-                and board[r + 3][c + 3] == piece
-            ):
-                return True
-
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(3, ROW_COUNT):
-            if (
-                board[r][c] == piece
-                and board[r - 1][c + 1] == piece
-                and board[r - 2][c + 2] == piece
-                and board[r - 3][c + 3] == piece
-            ):
-                return True
-
-    return False
+
+def get_winning_window(board, piece):
+    # The (row, col) cells of a completed window, for highlighting, or None
+    cells = np.asarray(board).reshape(-1)[WINDOWS]
+    complete = np.flatnonzero((cells == piece).all(axis=1))
+    if len(complete) == 0:
+        return None
+    return [divmod(int(i), COLUMN_COUNT) for i in WINDOWS[complete[0]]]
+
+
+def wins_after_move(board, row, col, piece):
+    # Only the windows through the cell just filled can have been completed
+    windows = WINDOWS[WINDOWS_BY_CELL[row * COLUMN_COUNT + col]]
+    return bool((np.asarray(board).reshape(-1)[windows] == piece).all(axis=1).any())
 
 
 def get_valid_locations(board):
-    valid_locations = []
-    for col in range(COLUMN_COUNT):
-        if is_valid_location(board, col):
-            valid_locations.append(col)
-    return valid_locations
+    return np.flatnonzero(board[ROW_COUNT - 1] == 0).tolist()
 
 
 def is_terminal_node(board, player_piece, ai_piece):
     return (
         winning_move(board, player_piece)
         or winning_move(board, ai_piece)
-        or len(get_valid_locations(board)) == 0
+        or bool(board[ROW_COUNT - 1].all())
     )
+
+
+def winning_move_batch(boards, piece):
+    # boards is a stack of shape (N, ROW_COUNT, COLUMN_COUNT); one flag per board
+    boards = np.asarray(boards)
+    cells = boards.reshape(len(boards), ROW_COUNT * COLUMN_COUNT)[:, WINDOWS]
+    return (cells == piece).all(axis=2).any(axis=1)
+
+
+def get_child_boards(board, piece):
+    # Every board reachable with one drop of piece, stacked, with its column
+    cols = get_valid_locations(board)
+    children = np.repeat(board[np.newaxis], len(cols), axis=0)
+    for i, col in enumerate(cols):
+        children[i, get_next_open_row(board, col), col] = piece
+    return cols, children
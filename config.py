@@ -1,4 +1,4 @@
-import pygame
+import os
 
 # Colors
 BLUE = (44, 77, 125, 1)
@@ -10,10 +10,13 @@ GREEN = (5, 64, 43, 1)
 GRAY = (128, 128, 128)
 ORANGE = (255, 114, 55, 1)
 
-# Game constants
-ROW_COUNT = 6
-COLUMN_COUNT = 7
-SQUARESIZE = 100
+# Game constants. CONNECT4_ROWS, CONNECT4_COLUMNS and CONNECT4_LENGTH select
+# another board or connect-N variant; worker processes inherit them
+ROW_COUNT = int(os.environ.get("CONNECT4_ROWS", 6))
+COLUMN_COUNT = int(os.environ.get("CONNECT4_COLUMNS", 7))
+WINDOW_LENGTH = int(os.environ.get("CONNECT4_LENGTH", 4))
+# Squares shrink so larger boards still fit on screen
+SQUARESIZE = min(100, int(850 // (ROW_COUNT + 2.5)), 1200 // COLUMN_COUNT)
 RADIUS = int(SQUARESIZE / 2 - 5)
 
 # Player constants
@@ -22,7 +25,6 @@ AI = 1
 EMPTY = 0
 PLAYER_PIECE = 1
 AI_PIECE = 2
-WINDOW_LENGTH = 4
 
 # Calculate window dimensions
 WIDTH = COLUMN_COUNT * SQUARESIZE
@@ -33,15 +35,74 @@ SIZE = (WIDTH, HEIGHT)
 EASY = 120
 MEDIUM = 60
 HARD = 30
+PERFECT = 20
 
+# AI search settings
+TT_SIZE_MB = 16
 
-# Initialize pygame fonts
-pygame.font.init()
-TITLE_FONT = pygame.font.SysFont("monospace", 50)
-MENU_FONT = pygame.font.SysFont("monospace", 30)
-INFO_FONT = pygame.font.SysFont("monospace", 20)
-NAME_FONT = pygame.font.SysFont("monospace", 24)
-INPUT_FONT = pygame.font.SysFont("monospace", 32)
-MESSAGE_FONT = pygame.font.SysFont("monospace", 50)
-TIMER_FONT = pygame.font.SysFont("monospace", 20)
-PAUSE_HINT_FONT = pygame.font.SysFont("monospace", 36)
+# Per-move thinking time in seconds for each difficulty
+AI_MOVE_TIME = {
+    EASY: 0.25,
+    MEDIUM: 0.5,
+    HARD: 1.0,
+    PERFECT: 2.0,
+}
+
+# Minimum time in milliseconds before the AI's move is shown
+AI_MIN_MOVE_DELAY = 500
+
+# Seconds a search thread may hold the GIL while the UI thread waits for it;
+# Python's 5 ms default costs the UI a frame now and then at 60 fps
+AI_SWITCH_INTERVAL = 0.0005
+
+# JSON lines file each AI search appends its statistics to, or None
+AI_STATS_LOG = None
+# Start games with the search statistics overlay shown; Tab toggles it
+SHOW_AI_STATS = False
+
+# Worker processes used by offline tools (self-play, book building)
+AI_WORKERS = os.cpu_count() or 1
+# Worker processes the in-game AI splits each search over; 1 keeps it in the
+# game's process. Opt in with CONNECT4_SEARCH_WORKERS once more workers are
+# measured to play stronger on the target machine
+AI_SEARCH_WORKERS = int(os.environ.get("CONNECT4_SEARCH_WORKERS", 1))
+
+# Opening book built offline by opening_book.py
+OPENING_BOOK_PATH = os.path.join(os.path.dirname(__file__), "opening_book.bin")
+OPENING_BOOK_PLIES = 4
+OPENING_BOOK_DEPTH = 10
+
+# Slots in the exact solver's table; a prime spreads the structured keys
+SOLVER_TABLE_SIZE = 1048573
+# Discs on the board before the PERFECT AI tries the solver; earlier positions
+# take it seconds to minutes, far beyond a move's budget
+SOLVER_MIN_PLY = 18
+
+# Reference timings for benchmark.py, and the slowdown it reports as a regression
+BENCHMARK_BASELINE_PATH = os.path.join(
+    os.path.dirname(__file__), "benchmark_baseline.json"
+)
+BENCHMARK_THRESHOLD = 0.25
+
+# Search results kept on disk between games by position_cache.py. Only nodes
+# searched at least POSITION_CACHE_MIN_DEPTH deep are worth a disk slot. Each
+# variant has its own file, since opening one for another variant clears it
+POSITION_CACHE_PATH = os.path.join(
+    os.path.dirname(__file__),
+    f"position_cache_{ROW_COUNT}x{COLUMN_COUNT}_{WINDOW_LENGTH}.bin",
+)
+POSITION_CACHE_SIZE_MB = 32
+POSITION_CACHE_MIN_DEPTH = 4
+POSITION_CACHE_BATCH = 4096
+
+
+# Fonts as (family, size); ui.fonts.get_font creates each one on first use, so
+# importing these constants never starts pygame
+TITLE_FONT = ("monospace", 50)
+MENU_FONT = ("monospace", 30)
+INFO_FONT = ("monospace", 20)
+NAME_FONT = ("monospace", 24)
+INPUT_FONT = ("monospace", 32)
+MESSAGE_FONT = ("monospace", 50)
+TIMER_FONT = ("monospace", 20)
+PAUSE_HINT_FONT = ("monospace", 36)
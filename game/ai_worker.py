@@ -0,0 +1,219 @@
+import json
+import sys
+import threading
+import time
+from ai import (
+    CENTER_ORDER,
+    WIN_SCORE,
+    LOSS_SCORE,
+    SearchStats,
+    SearchTimeout,
+    get_principal_variation,
+    iterative_deepening,
+)
+from bitboard import BitBoard, mirror_column, to_bitboard
+from config import (
+    PLAYER_PIECE,
+    AI_PIECE,
+    ROW_COUNT,
+    COLUMN_COUNT,
+    AI_STATS_LOG,
+    AI_SWITCH_INTERVAL,
+    SOLVER_MIN_PLY,
+)
+from solver import score_to_outcome
+
+
+def is_settled(result, max_depth):
+    # A proven win or loss, or a search that reached the end of the game,
+    # cannot be improved by searching longer
+    _, value, depth = result
+    return value >= WIN_SCORE or value <= LOSS_SCORE or depth >= max_depth
+
+
+def mirror_result(result):
+    col, value, depth = result
+    return mirror_column(col), value, depth
+
+
+class AISearchWorker:
+    def __init__(self, tt, book=None, solver=None, parallel=None):
+        self.tt = tt
+        self.book = book
+        # With a solver, positions it can prove in time get perfect play
+        self.solver = solver
+        # A parallel.ParallelSearch to spread each search over worker processes
+        self.parallel = parallel
+        self.thread = None
+        self.stop_event = None
+        self.result = None
+        # Statistics of the search behind the last move, None for book moves
+        # and pondered answers
+        self.stats = None
+        self.pondering = False
+        # Finished searches for positions the human might create, keyed by
+        # the canonical hash of the position after their reply and stored for
+        # the canonical orientation
+        self.ponder_results = {}
+
+        # Searches run on threads next to the UI; switching more often keeps
+        # the frame rate up while they hold the GIL
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, AI_SWITCH_INTERVAL))
+
+    def start(self, board, time_budget):
+        self.cancel()
+        bitboard = BitBoard.from_array(board)
+        key, mirrored = bitboard.canonical_hash()
+        pondered = self.ponder_results.get(key)
+        if pondered is not None and mirrored:
+            pondered = mirror_result(pondered)
+        self.ponder_results = {}
+
+        self.stats = None
+        booked = self.book.lookup(bitboard) if self.book is not None else None
+        if booked is not None:
+            self.result = booked
+            return
+        if pondered is not None:
+            self.result = pondered
+            return
+
+        self._start_thread(self._run, board, time_budget)
+
+    def ponder(self, board, time_budget):
+        self.cancel()
+        self.ponder_results = {}
+        self.pondering = True
+        self._start_thread(self._ponder, board, time_budget)
+
+    def _start_thread(self, target, board, time_budget):
+        self.stop_event = threading.Event()
+        # Search a snapshot so the game can keep drawing the live board
+        self.thread = threading.Thread(
+            target=target,
+            args=(board.copy(), time_budget, self.stop_event),
+            daemon=True,
+        )
+        self.thread.start()
+
+    def _run(self, board, time_budget, stop_event):
+        stats = SearchStats()
+        result = self._search(board, time_budget, stop_event, stats)
+        # Deep results go to the on-disk cache once per search
+        self.tt.flush()
+        if not stop_event.is_set():
+            self.stats = stats
+            if AI_STATS_LOG is not None:
+                self._log_stats(board, result, stats)
+            self.result = result
+
+    def _log_stats(self, board, result, stats):
+        col, value, depth = result
+        record = {
+            "ply": to_bitboard(board).move_count,
+            "move": col,
+            "value": value,
+            "depth": depth,
+            **stats.to_dict(),
+        }
+        with open(AI_STATS_LOG, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+    def _search(self, board, time_budget, stop_event, stats=None):
+        bitboard = to_bitboard(board)
+        if self.solver is not None and bitboard.move_count >= SOLVER_MIN_PLY:
+            # The solver gets half the budget; unsolved positions fall back to
+            # the heuristic search for the rest
+            start = time.perf_counter()
+            try:
+                col, score = self.solver.best_move(
+                    bitboard, AI_PIECE, time_budget / 2, stop_event
+                )
+            except SearchTimeout:
+                time_budget -= time.perf_counter() - start
+            else:
+                if stats is not None:
+                    stats.nodes = self.solver.nodes
+                    stats.elapsed = time.perf_counter() - start
+                outcome, distance = score_to_outcome(score, bitboard.move_count)
+                value = {"win": WIN_SCORE, "loss": LOSS_SCORE, "draw": 0}[outcome]
+                return col, value, distance
+
+        search = iterative_deepening
+        if self.parallel is not None:
+            search = self.parallel.iterative_deepening
+        return search(board, time_budget, self.tt, stop_event=stop_event, stats=stats)
+
+    def _ponder(self, board, time_budget, stop_event):
+        board = BitBoard.from_array(board)
+
+        # The reply the last search expected comes first, then centre-out
+        predicted = get_principal_variation(board, self.tt, maximizingPlayer=False)
+        replies = [c for c in CENTER_ORDER if board.can_play(c)]
+        if predicted and predicted[0] in replies:
+            replies.remove(predicted[0])
+            replies.insert(0, predicted[0])
+
+        # Keep revisiting every reply with a doubled budget until the human
+        # moves or every line has been searched to the end of the game
+        while not stop_event.is_set():
+            finished = True
+            # Mirror-image replies lead to one canonical position, searched once
+            searched = set()
+            for col in replies:
+                board.play(col, PLAYER_PIECE)
+                key, mirrored = board.canonical_hash()
+                max_depth = ROW_COUNT * COLUMN_COUNT - board.move_count
+                previous = self.ponder_results.get(key)
+
+                if (
+                    key in searched
+                    or board.is_win(PLAYER_PIECE)
+                    or max_depth == 0
+                    or (previous is not None and is_settled(previous, max_depth))
+                ):
+                    board.undo()
+                    continue
+
+                result = self._search(board, time_budget, stop_event)
+                board.undo()
+                self.tt.flush()
+                if stop_event.is_set():
+                    return
+                searched.add(key)
+                self.ponder_results[key] = mirror_result(result) if mirrored else result
+                finished = False
+
+            if finished:
+                return
+            time_budget *= 2
+
+    def is_busy(self):
+        return (self.thread is not None and not self.pondering) or (
+            self.result is not None
+        )
+
+    def poll(self):
+        if self.pondering:
+            return None
+        if self.thread is not None:
+            if self.thread.is_alive():
+                return None
+            self.thread = None
+        result, self.result = self.result, None
+        return result
+
+    def cancel(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        self.result = None
+        self.pondering = False
+
+    def close(self):
+        self.cancel()
+        if self.parallel is not None:
+            self.parallel.close()
+        sys.setswitchinterval(self.switch_interval)
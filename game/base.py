@@ -1,26 +1,40 @@
 import pygame
 import sys
-from board import create_board, get_valid_locations, print_board, winning_move
-from ui.draw import draw_board, draw_pause_menu
-from config import BLACK, WHITE, SQUARESIZE, WIDTH, MESSAGE_FONT, NAME_FONT
+from board import (
+    create_board,
+    get_column_heights,
+    get_winning_window,
+    print_board,
+    wins_after_move,
+)
+from ui.draw import (
+    HEADER_RECT,
+    draw_board,
+    draw_pause_menu,
+    draw_piece,
+    draw_winning_window,
+)
+from ui.fonts import get_font
+from config import (
+    BLACK,
+    WHITE,
+    SQUARESIZE,
+    WIDTH,
+    ROW_COUNT,
+    MESSAGE_FONT,
+    NAME_FONT,
+)
 
 
 class Game:
     def __init__(self, screen):
         self.screen = screen
         self.board = create_board()
+        self.heights = get_column_heights(self.board)
         self.game_over = False
         self.paused = False
-        self.message_font = (
-            pygame.font.SysFont("monospace", 50)
-            if not pygame.font.get_init()
-            else MESSAGE_FONT
-        )
-        self.name_font = (
-            pygame.font.SysFont("monospace", 24)
-            if not pygame.font.get_init()
-            else NAME_FONT
-        )
+        self.message_font = get_font(MESSAGE_FONT)
+        self.name_font = get_font(NAME_FONT)
 
         self.last_frame_time = 0
         self.frame_rate = 30
@@ -46,7 +60,7 @@ class Game:
                 return self.handle_pause_menu()
             else:
                 self.paused = False
-                draw_board(self.board, self.screen)
+                self.redraw()
                 return "continue"
         return None
 
@@ -63,7 +77,7 @@ class Game:
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     self.paused = False
                     pause_menu_active = False
-                    draw_board(self.board, self.screen)
+                    self.redraw()
                     return "continue"
 
                 if event.type == pygame.MOUSEBUTTONDOWN:
@@ -72,7 +86,7 @@ class Game:
                     if continue_button.collidepoint(mouse_pos):
                         self.paused = False
                         pause_menu_active = False
-                        draw_board(self.board, self.screen)
+                        self.redraw()
                         return "continue"
 
                     elif restart_button.collidepoint(mouse_pos):
@@ -84,21 +98,21 @@ class Game:
                         self.game_over = True
                         return "menu"
 
-            pygame.display.update()
+            # The menu is static, so there is nothing to flip until it closes
+            pygame.time.wait(1000 // self.frame_rate)
 
     def handle_game_over(self):
         if self.game_over:
-            pygame.display.update()
             pygame.time.wait(3000)
             return True
         return False
 
     def check_draw(self):
-        if not self.game_over and len(get_valid_locations(self.board)) == 0:
+        if not self.game_over and min(self.heights) == ROW_COUNT:
             pygame.draw.rect(self.screen, BLACK, (0, 0, WIDTH, SQUARESIZE))
             label = self.message_font.render("It's a draw!", 1, WHITE)
             self.screen.blit(label, (WIDTH // 2 - label.get_width() // 2, 10))
-            pygame.display.update()
+            pygame.display.update(HEADER_RECT)
             self.game_over = True
             return True
         return False
@@ -108,14 +122,25 @@ class Game:
         label = self.message_font.render(f"{winner_name} wins!!", 1, winner_color)
         self.screen.blit(label, (WIDTH // 2 - label.get_width() // 2, 10))
         self.game_over = True
-        pygame.display.update()
+        pygame.display.update(HEADER_RECT)
 
-    def handle_move_completion(self, piece_type, player_name, color):
-        print_board(self.board)
+    def redraw(self):
+        # Full repaint, for a new game and after the pause menu covered it all
+        self.screen.fill(BLACK)
         draw_board(self.board, self.screen)
         pygame.display.update()
 
-        if winning_move(self.board, piece_type):
+    def handle_move_completion(self, piece_type, player_name, color, row, col):
+        print_board(self.board)
+        # Only the new disc changed on the board
+        pygame.display.update(draw_piece(self.screen, row, col, piece_type))
+
+        if wins_after_move(self.board, row, col, piece_type):
+            pygame.display.update(
+                draw_winning_window(
+                    self.screen, get_winning_window(self.board, piece_type)
+                )
+            )
             self.display_winner(player_name, color)
             return True
 
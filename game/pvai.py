@@ -1,17 +1,23 @@
 import pygame
 import math
 import random
+import numpy as np
 from game.base import Game
 from board import (
-    drop_piece,
+    make_move,
     is_valid_location,
-    get_next_open_row,
     print_board,
-    winning_move,
 )
-from ai import minimax
-from ui.draw import draw_board, draw_hover_piece
+from ai import get_move_budget
+from game.ai_worker import AISearchWorker
+from opening_book import OpeningBook
+from solver import Solver
+from parallel import ParallelSearch
+from position_cache import open_position_cache
+from transposition import TranspositionTable
+from ui.draw import HEADER_RECT, draw_hover_piece
 from ui.input import get_difficulty
+from ui.fonts import get_font
 from config import (
     BLACK,
     RED,
@@ -25,6 +31,14 @@ from config import (
     AI,
     PLAYER_PIECE,
     AI_PIECE,
+    ROW_COUNT,
+    COLUMN_COUNT,
+    AI_MIN_MOVE_DELAY,
+    PERFECT,
+    SHOW_AI_STATS,
+    INFO_FONT,
+    AI_SEARCH_WORKERS,
+    POSITION_CACHE_PATH,
 )
 
 
@@ -43,7 +57,20 @@ class PlayerVsAIGame(Game):
 
         self.turn = random.randint(PLAYER, AI)
 
-        draw_board(self.board, self.screen)
+        # Kept for the whole game so later turns reuse earlier searches, and
+        # backed by the on-disk cache so later games and restarts do too
+        self.transposition_table = TranspositionTable(cache=open_position_cache())
+        solver = Solver() if self.time_limit == PERFECT else None
+        parallel = None
+        if AI_SEARCH_WORKERS > 1:
+            parallel = ParallelSearch(AI_SEARCH_WORKERS, cache_path=POSITION_CACHE_PATH)
+        self.ai_worker = AISearchWorker(
+            self.transposition_table, OpeningBook.load(), solver, parallel
+        )
+        self.ai_search_started = 0
+        self.show_stats = SHOW_AI_STATS
+
+        self.redraw()
 
     def run(self):
         while not self.game_over:
@@ -68,12 +95,22 @@ class PlayerVsAIGame(Game):
                     and event.key == pygame.K_ESCAPE
                     and not self.game_over
                 ):
+                    # The search restarts from scratch once the game resumes
+                    self.ai_worker.cancel()
                     pause_action = self.handle_pause_key(event)
                     if pause_action == "restart":
                         return "restart"
                     elif pause_action == "menu":
                         return "menu"
 
+                elif (
+                    event.type == pygame.KEYDOWN
+                    and event.key == pygame.K_TAB
+                    and not self.paused
+                ):
+                    self.show_stats = not self.show_stats
+                    self.update_ui(current_time)
+
                 elif not self.paused and self.turn == PLAYER:
                     if event.type == pygame.MOUSEMOTION:
                         pygame.draw.rect(
@@ -112,7 +149,7 @@ class PlayerVsAIGame(Game):
                                 time_text, (WIDTH // 4 - time_text.get_width() // 2, 40)
                             )
 
-                        pygame.display.update()
+                        pygame.display.update(HEADER_RECT)
 
                     if event.type == pygame.MOUSEBUTTONDOWN:
                         pygame.draw.rect(
@@ -126,16 +163,26 @@ class PlayerVsAIGame(Game):
             if self.turn == AI and not self.game_over and not self.paused:
                 self.handle_ai_move()
 
+            # Use the human's thinking time to search their likely replies
+            if (
+                self.turn == PLAYER
+                and not self.game_over
+                and not self.paused
+                and not self.ai_worker.pondering
+            ):
+                self.ai_worker.ponder(self.board, self.get_ai_time_budget())
+
+            if self.game_over:
+                self.ai_worker.cancel()
+
             if current_time - self.last_frame_time > 1000 / self.frame_rate:
                 if not self.paused:
                     self.update_ui(current_time)
                 self.last_frame_time = current_time
 
             if self.handle_game_over():
-                pygame.display.update()
                 return None
 
-            pygame.display.update()
             self.clock.tick(60)
 
         return None
@@ -146,33 +193,55 @@ class PlayerVsAIGame(Game):
         label = self.message_font.render(f"{self.ai_name} wins on time!!", 1, YELLOW)
         self.screen.blit(label, (WIDTH // 2 - label.get_width() // 2, 10))
         self.game_over = True
-        pygame.display.update()
+        pygame.display.update(HEADER_RECT)
 
     def handle_player_move(self, event):
         posx = event.pos[0]
         col = int(math.floor(posx / SQUARESIZE))
 
         if is_valid_location(self.board, col):
-            row = get_next_open_row(self.board, col)
-            drop_piece(self.board, row, col, PLAYER_PIECE)
+            self.ai_worker.cancel()
+            row = make_move(self.board, self.heights, col, PLAYER_PIECE)
             self.player_time[PLAYER] = self.default_time[PLAYER]
 
             game_ended = self.handle_move_completion(
-                PLAYER_PIECE, self.player_name, RED
+                PLAYER_PIECE, self.player_name, RED, row, col
             )
 
             if not self.game_over and not game_ended:
                 self.turn = AI
 
+    def close(self):
+        self.ai_worker.close()
+
+    def get_ai_time_budget(self):
+        empty_cells = ROW_COUNT * COLUMN_COUNT - int(np.count_nonzero(self.board))
+        return get_move_budget(
+            self.time_limit, self.player_time[AI], (empty_cells + 1) // 2
+        )
+
     def handle_ai_move(self):
-        col, minimax_score = minimax(self.board, 5, -math.inf, math.inf, True)
+        if not self.ai_worker.is_busy():
+            self.ai_search_started = pygame.time.get_ticks()
+            # Answers at once from the opening book or a pondered position
+            self.ai_worker.start(self.board, self.get_ai_time_budget())
+            return
+
+        # Keep the move on screen for a moment even when the search is instant
+        if pygame.time.get_ticks() - self.ai_search_started < AI_MIN_MOVE_DELAY:
+            return
+
+        result = self.ai_worker.poll()
+        if result is None:
+            return
 
+        col, minimax_score, depth = result
         if is_valid_location(self.board, col):
-            pygame.time.wait(500)
-            row = get_next_open_row(self.board, col)
-            drop_piece(self.board, row, col, AI_PIECE)
+            row = make_move(self.board, self.heights, col, AI_PIECE)
 
-            game_ended = self.handle_move_completion(AI_PIECE, self.ai_name, YELLOW)
+            game_ended = self.handle_move_completion(
+                AI_PIECE, self.ai_name, YELLOW, row, col
+            )
 
             if not self.game_over and not game_ended:
                 self.turn = PLAYER
@@ -192,7 +261,8 @@ class PlayerVsAIGame(Game):
             p1_text = self.name_font.render(f"{self.player_name}", 1, (128, 128, 128))
             p2_text = self.name_font.render(f"{self.ai_name}", 1, YELLOW)
 
-            thinking_text = self.name_font.render(" thinking...", 1, WHITE)
+            dots = "." * (current_time // 300 % 4)
+            thinking_text = self.name_font.render(f" thinking{dots}", 1, WHITE)
             self.screen.blit(
                 thinking_text, (3 * WIDTH // 4 + p2_text.get_width() // 2, 10)
             )
@@ -209,5 +279,29 @@ class PlayerVsAIGame(Game):
         )
         self.screen.blit(time_text, (WIDTH // 4 - time_text.get_width() // 2, 40))
 
-        pygame.display.update()
+        if self.show_stats:
+            self.draw_stats()
+
+        pygame.display.update(HEADER_RECT)
         self.last_frame_time = current_time
+
+    def draw_stats(self):
+        stats = self.ai_worker.stats
+        if stats is None:
+            return
+
+        parts = [f"{stats.nodes} nodes"]
+        if stats.depths:
+            parts.insert(0, f"depth {stats.depths[-1][0]}")
+        nps = stats.nodes_per_second()
+        if nps is not None:
+            parts.append(f"{nps / 1000:.0f}k nps")
+        ebf = stats.effective_branching_factor()
+        if ebf is not None:
+            parts.append(f"ebf {ebf:.1f}")
+        hit_rate = stats.tt_hit_rate()
+        if hit_rate is not None:
+            parts.append(f"tt {hit_rate:.0%}")
+
+        label = get_font(INFO_FONT).render("  ".join(parts), 1, GRAY)
+        self.screen.blit(label, (WIDTH // 2 - label.get_width() // 2, 70))
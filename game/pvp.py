@@ -2,13 +2,11 @@ import pygame
 import math
 from game.base import Game
 from board import (
-    drop_piece,
+    make_move,
     is_valid_location,
-    get_next_open_row,
     print_board,
-    winning_move,
 )
-from ui.draw import draw_board
+from ui.draw import HEADER_RECT
 from ui.input import get_player_names
 from config import (
     BLACK,
@@ -38,7 +36,7 @@ class PlayerVsPlayerGame(Game):
         self.turn = 0
 
         self.clock = pygame.time.Clock()
-        draw_board(self.board, self.screen)
+        self.redraw()
 
     def run(self):
         while not self.game_over:
@@ -87,7 +85,7 @@ class PlayerVsPlayerGame(Game):
                             RADIUS,
                         )
 
-                        pygame.display.update()
+                        pygame.display.update(HEADER_RECT)
 
                     if event.type == pygame.MOUSEBUTTONDOWN:
                         pygame.draw.rect(
@@ -107,7 +105,6 @@ class PlayerVsPlayerGame(Game):
 
             if self.handle_game_over():
                 return None
-            pygame.display.update()
             self.clock.tick(60)
 
         return None
@@ -158,19 +155,17 @@ class PlayerVsPlayerGame(Game):
         col = int(math.floor(posx / SQUARESIZE))
 
         if is_valid_location(self.board, col):
-            row = get_next_open_row(self.board, col)
-
             if self.turn == 0:
-                drop_piece(self.board, row, col, PLAYER_PIECE)
+                row = make_move(self.board, self.heights, col, PLAYER_PIECE)
                 self.player_time[self.turn] = self.default_time[self.turn]
                 game_ended = self.handle_move_completion(
-                    PLAYER_PIECE, self.player1_name, RED
+                    PLAYER_PIECE, self.player1_name, RED, row, col
                 )
             else:
-                drop_piece(self.board, row, col, AI_PIECE)
+                row = make_move(self.board, self.heights, col, AI_PIECE)
                 self.player_time[self.turn] = self.default_time[self.turn]
                 game_ended = self.handle_move_completion(
-                    AI_PIECE, self.player2_name, YELLOW
+                    AI_PIECE, self.player2_name, YELLOW, row, col
                 )
 
             if not self.game_over and not game_ended:
@@ -186,5 +181,5 @@ class PlayerVsPlayerGame(Game):
             self.screen, player_color, (self.mouse_pos_x, int(SQUARESIZE * 1.5)), RADIUS
         )
 
-        pygame.display.update()
+        pygame.display.update(HEADER_RECT)
         self.last_frame_time = current_time
@@ -59,6 +59,7 @@ def run_pvai_game(screen):
     while restart:
         game = PlayerVsAIGame(screen)
         result = game.run()
+        game.close()
 
         if result == "restart":
             restart = True
@@ -0,0 +1,163 @@
+import argparse
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config import (
+    PLAYER_PIECE,
+    AI_PIECE,
+    ROW_COUNT,
+    COLUMN_COUNT,
+    WINDOW_LENGTH,
+    AI_WORKERS,
+    OPENING_BOOK_PATH,
+    OPENING_BOOK_PLIES,
+    OPENING_BOOK_DEPTH,
+)
+from ai import iterative_deepening
+from bitboard import POSITION_KEY_BYTES, BitBoard, mirror_column, to_bitboard
+
+BOOK_MAGIC = b"C4BK"
+# Magic, board rows and columns, line length, number of plies covered,
+# record count
+HEADER = struct.Struct("<4sBBBBI")
+# Canonical position key (little-endian), best move, search depth, score
+RECORD = struct.Struct(f"<{POSITION_KEY_BYTES}sBBq")
+
+
+class OpeningBook:
+    def __init__(self, entries=None, plies=0):
+        # entries maps canonical key -> (move, depth, score), with the move
+        # given for the canonical orientation
+        self.entries = entries if entries is not None else {}
+        self.plies = plies
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path=OPENING_BOOK_PATH):
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return cls()
+
+        if len(data) < HEADER.size:
+            return cls()
+        magic, rows, columns, length, plies, count = HEADER.unpack_from(data, 0)
+        # A book for another variant, or in an older layout, is useless here
+        if (
+            (magic, rows, columns, length)
+            != (BOOK_MAGIC, ROW_COUNT, COLUMN_COUNT, WINDOW_LENGTH)
+            or len(data) != HEADER.size + count * RECORD.size
+        ):
+            return cls()
+
+        entries = {}
+        for key, move, depth, score in RECORD.iter_unpack(
+            data[HEADER.size : HEADER.size + count * RECORD.size]
+        ):
+            entries[int.from_bytes(key, "little")] = (move, depth, score)
+        return cls(entries, plies)
+
+    def save(self, path=OPENING_BOOK_PATH):
+        with open(path, "wb") as file:
+            file.write(
+                HEADER.pack(
+                    BOOK_MAGIC,
+                    ROW_COUNT,
+                    COLUMN_COUNT,
+                    WINDOW_LENGTH,
+                    self.plies,
+                    len(self.entries),
+                )
+            )
+            for key in sorted(self.entries):
+                file.write(
+                    RECORD.pack(
+                        key.to_bytes(POSITION_KEY_BYTES, "little"), *self.entries[key]
+                    )
+                )
+
+    def lookup(self, board):
+        board = to_bitboard(board)
+        if board.move_count > self.plies:
+            return None
+
+        key, mirrored = board.canonical_key()
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        move, depth, score = entry
+        if mirrored:
+            move = mirror_column(move)
+        return move, score, depth
+
+
+def collect_positions(plies):
+    # Canonical keys of the positions where the AI is to move, whichever side
+    # opened the game. A key decodes to the position in canonical orientation
+    positions = set()
+
+    def visit(board, ply, piece):
+        if board.is_win(PLAYER_PIECE) or board.is_win(AI_PIECE) or board.is_full():
+            return
+        if piece == AI_PIECE:
+            positions.add(board.canonical_key()[0])
+        if ply == plies:
+            return
+        next_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+        for col in board.valid_moves():
+            board.play(col, piece)
+            visit(board, ply + 1, next_piece)
+            board.undo()
+
+    for first_piece in (AI_PIECE, PLAYER_PIECE):
+        visit(BitBoard(), 0, first_piece)
+    return positions
+
+
+def _search_position(item):
+    key, depth = item
+    move, score, completed_depth = iterative_deepening(
+        BitBoard.from_key(key), float("inf"), max_depth=depth
+    )
+    return key, move, completed_depth, score
+
+
+def generate_opening_book(
+    plies=OPENING_BOOK_PLIES, depth=OPENING_BOOK_DEPTH, workers=AI_WORKERS
+):
+    items = [(key, depth) for key in sorted(collect_positions(plies))]
+
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for key, move, completed_depth, score in pool.map(
+            _search_position, items, chunksize=16
+        ):
+            entries[key] = (move, completed_depth, score)
+    return OpeningBook(entries, plies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Connect 4 opening book")
+    parser.add_argument("--plies", type=int, default=OPENING_BOOK_PLIES)
+    parser.add_argument("--depth", type=int, default=OPENING_BOOK_DEPTH)
+    parser.add_argument("--workers", type=int, default=AI_WORKERS)
+    parser.add_argument("--output", default=OPENING_BOOK_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    book = generate_opening_book(args.plies, args.depth, args.workers)
+    book.save(args.output)
+    print(
+        f"Wrote {len(book)} positions to {args.output} "
+        f"({os.path.getsize(args.output)} bytes) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from config import PLAYER_PIECE, AI_PIECE, EMPTY, AI_WORKERS
+from ai import (
+    SearchContext,
+    SearchTimeout,
+    get_threat_moves,
+    get_tt_key,
+    iterative_deepening,
+    minimax,
+    to_evaluated_bitboard,
+)
+from bitboard import BitBoard, mirror_column
+from position_cache import open_position_cache
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+
+# Shallower iterations finish faster in this process than a round trip to
+# the workers takes
+PARALLEL_MIN_DEPTH = 5
+
+# Seconds between checks for a stop request or the deadline while waiting
+POLL_INTERVAL = 0.005
+
+# Each worker process keeps its own table between tasks, and shares the
+# stop flag with the parent
+_worker_tt = None
+_worker_stop = None
+
+
+def _init_worker(seed, cache_path, stop):
+    global _worker_tt, _worker_stop
+    # Workers can share one on-disk cache; each reads it directly and writes
+    # its results back after every task
+    cache = open_position_cache(cache_path) if cache_path is not None else None
+    _worker_tt = TranspositionTable(cache=cache)
+    _worker_stop = stop
+    if seed is not None:
+        random.seed(seed)
+
+
+def _search_move(key, col, depth, alpha, beta, maximizingPlayer, deadline, seeded):
+    # Search the root move col and return (value, stats); value is None when
+    # the search was stopped or ran past deadline, a time.time() timestamp
+    board = to_evaluated_bitboard(BitBoard.from_key(key))
+    board.play(col, AI_PIECE if maximizingPlayer else PLAYER_PIECE)
+
+    # Entries left by earlier tasks depend on which worker ran what, so a
+    # seeded search starts every move from an empty table
+    if seeded:
+        _worker_tt.clear()
+    _worker_tt.new_search()
+
+    context = SearchContext(_worker_tt, stop_event=_worker_stop)
+    if deadline is not None:
+        context.deadline = time.perf_counter() + deadline - time.time()
+    try:
+        _, value = minimax(
+            board, depth - 1, alpha, beta, not maximizingPlayer, context
+        )
+    except SearchTimeout:
+        value = None
+    _worker_tt.flush()
+    return value, context.stats
+
+
+class ParallelSearch:
+    def __init__(self, workers=AI_WORKERS, seed=None, cache_path=None):
+        self.workers = workers
+        self.seed = seed
+        self.nodes = 0
+        # Set to make every worker abandon its task at the next time check
+        self.stop = multiprocessing.Event()
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(seed, cache_path, self.stop),
+        )
+        # Start the workers now, from the thread creating the pool, instead of
+        # from whichever thread runs the first search
+        self.pool.submit(int)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.stop.set()
+        self.pool.shutdown(cancel_futures=True)
+
+    def search_root(self, board, depth, alpha, beta, maximizingPlayer, context):
+        # A drop-in for minimax at the root. The first move is searched here,
+        # then its value bounds the remaining moves, which the workers search
+        # side by side (young brothers wait)
+        board = to_evaluated_bitboard(board)
+        if depth < PARALLEL_MIN_DEPTH or board.winner() != EMPTY or board.is_full():
+            return minimax(board, depth, alpha, beta, maximizingPlayer, context)
+
+        piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+        winning_column, moves = get_threat_moves(board, piece)
+        if winning_column is not None or len(moves) < 2:
+            return minimax(board, depth, alpha, beta, maximizingPlayer, context)
+
+        context.check_time()
+        alpha_orig, beta_orig = alpha, beta
+        tt = context.tt
+        tt_move = None
+        if tt is not None:
+            key, mirrored = get_tt_key(board, maximizingPlayer)
+            entry = tt.probe(key)
+            context.stats.tt_probes += 1
+            if entry is not None:
+                context.stats.tt_hits += 1
+            if entry is not None and entry[4] is not None:
+                tt_move = mirror_column(entry[4]) if mirrored else entry[4]
+        moves = context.order_moves(board, moves, tt_move, piece)
+
+        # The first move is the expected principal variation, split the same
+        # way one level down so the workers help along the whole line
+        column = moves[0]
+        board.play(column, piece)
+        _, value = self.search_root(
+            board, depth - 1, alpha, beta, not maximizingPlayer, context
+        )
+        board.undo()
+
+        # A sibling only matters if it beats the first move, so its window
+        # starts at that move's value
+        if maximizingPlayer:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        deadline = None
+        if context.deadline is not None:
+            deadline = time.time() + context.deadline - time.perf_counter()
+        # Workers get the root as a packed key rather than a pickled array
+        root_key = board.position_key()
+        futures = [
+            self.pool.submit(
+                _search_move,
+                root_key,
+                col,
+                depth,
+                alpha,
+                beta,
+                maximizingPlayer,
+                deadline,
+                self.seed is not None,
+            )
+            for col in moves[1:]
+        ]
+        results = self._collect(futures, context)
+
+        # Moves are taken in search order and only a strictly better value
+        # replaces the best, so ties resolve the same way on every run
+        for col, new_score in zip(moves[1:], results):
+            if (maximizingPlayer and new_score > value) or (
+                not maximizingPlayer and new_score < value
+            ):
+                column, value = col, new_score
+
+        if tt is not None:
+            if value <= alpha_orig:
+                flag = UPPER_BOUND
+            elif value >= beta_orig:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            tt.store(
+                key, depth, value, flag, mirror_column(column) if mirrored else column
+            )
+        return column, value
+
+    def _collect(self, futures, context):
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, POLL_INTERVAL, FIRST_COMPLETED)
+            stopped = any(future.result()[0] is None for future in done) or (
+                context.stop_event is not None and context.stop_event.is_set()
+            )
+            if context.deadline is not None and time.perf_counter() > context.deadline:
+                stopped = True
+            if stopped:
+                self._abort(pending)
+                self._merge_stats(futures, context)
+                raise SearchTimeout()
+
+        self._merge_stats(futures, context)
+        return [future.result()[0] for future in futures]
+
+    def _abort(self, pending):
+        # Queued moves are dropped and running ones stop at their next time
+        # check; the flag is cleared only once no task can still see it
+        self.stop.set()
+        for future in pending:
+            future.cancel()
+        wait(pending)
+        self.stop.clear()
+
+    def _merge_stats(self, futures, context):
+        # Workers' nodes, leaves, cutoffs and table probes all count towards
+        # the search, so the overlay and log describe the whole tree
+        for future in futures:
+            if not future.cancelled():
+                context.stats.merge(future.result()[1])
+
+    def minimax(self, board, depth, maximizingPlayer=True):
+        # One fixed-depth search, without a deadline
+        context = SearchContext(TranspositionTable())
+        result = self.search_root(
+            board.copy() if isinstance(board, BitBoard) else board,
+            depth,
+            -math.inf,
+            math.inf,
+            maximizingPlayer,
+            context,
+        )
+        self.nodes = context.stats.nodes
+        return result
+
+    def iterative_deepening(
+        self,
+        board,
+        time_budget,
+        tt=None,
+        max_depth=None,
+        stop_event=None,
+        maximizingPlayer=True,
+        stats=None,
+    ):
+        return iterative_deepening(
+            board,
+            time_budget,
+            tt,
+            max_depth=max_depth,
+            stop_event=stop_event,
+            maximizingPlayer=maximizingPlayer,
+            stats=stats,
+            search=self.search_root,
+        )
+
+
+def parallel_minimax(
+    board, depth, maximizingPlayer=True, workers=AI_WORKERS, seed=None
+):
+    with ParallelSearch(workers, seed) as search:
+        return search.minimax(board, depth, maximizingPlayer)
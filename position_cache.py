@@ -0,0 +1,175 @@
+import mmap
+import os
+import struct
+from config import (
+    ROW_COUNT,
+    COLUMN_COUNT,
+    WINDOW_LENGTH,
+    POSITION_CACHE_PATH,
+    POSITION_CACHE_SIZE_MB,
+    POSITION_CACHE_BATCH,
+)
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks on Windows; concurrent writers may then drop records,
+    # but the key check below still keeps torn records from being read
+    fcntl = None
+
+CACHE_MAGIC = b"C4PC"
+# Bump whenever the evaluation or search changes the values it returns, so
+# results from the old code are thrown away instead of trusted
+CACHE_VERSION = 1
+# Magic, version, board rows and columns, line length, slot count
+HEADER = struct.Struct("<4sBBBBI")
+# Checked key, score, and depth / flag / move packed into one word
+RECORD = struct.Struct("<QqQ")
+
+WORD_MASK = (1 << 64) - 1
+
+
+def _pack_meta(depth, flag, move):
+    # flag and move are stored plus one, so a used slot never has meta == 0
+    return depth | (flag + 1) << 8 | (move + 1 if move is not None else 0) << 16
+
+
+def _unpack_meta(meta):
+    move = (meta >> 16) - 1
+    return meta & 0xFF, (meta >> 8 & 0xFF) - 1, move if move >= 0 else None
+
+
+class PositionCache:
+    def __init__(
+        self,
+        path=POSITION_CACHE_PATH,
+        size_mb=POSITION_CACHE_SIZE_MB,
+        batch_size=POSITION_CACHE_BATCH,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        # Results waiting for the next flush, keyed like the file
+        self.pending = {}
+
+        # Create the file if needed without truncating one another process has
+        open(path, "ab").close()
+        self.file = open(path, "r+b")
+        try:
+            self.size = self._open_table(size_mb)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        except BaseException:
+            self.file.close()
+            raise
+        self.mask = self.size - 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _lock(self):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(self):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def _open_table(self, size_mb):
+        self._lock()
+        try:
+            file_size = os.fstat(self.file.fileno()).st_size
+            if file_size >= HEADER.size:
+                magic, version, rows, columns, length, size = HEADER.unpack(
+                    self.file.read(HEADER.size)
+                )
+                expected = (CACHE_MAGIC, CACHE_VERSION, ROW_COUNT, COLUMN_COUNT)
+                if (
+                    (magic, version, rows, columns) == expected
+                    and length == WINDOW_LENGTH
+                    and file_size == HEADER.size + size * RECORD.size
+                ):
+                    return size
+
+            # Missing, stale or for another variant: start an empty table. The
+            # slot count is a power of two so indexing is a mask
+            slots = max(1, size_mb * 1024 * 1024 // RECORD.size)
+            size = 1 << (slots.bit_length() - 1)
+            self.file.truncate(0)
+            self.file.seek(0)
+            self.file.write(
+                HEADER.pack(
+                    CACHE_MAGIC,
+                    CACHE_VERSION,
+                    ROW_COUNT,
+                    COLUMN_COUNT,
+                    WINDOW_LENGTH,
+                    size,
+                )
+            )
+            self.file.truncate(HEADER.size + size * RECORD.size)
+            self.file.flush()
+            return size
+        finally:
+            self._unlock()
+
+    def probe(self, key):
+        # Returns (depth, value, flag, move) or None
+        entry = self.pending.get(key)
+        if entry is not None:
+            return entry
+
+        # Reads take no lock. The stored key is XORed with the rest of the
+        # record, so a record torn by a concurrent write fails the key check
+        checked, value, meta = RECORD.unpack_from(
+            self.map, HEADER.size + (key & self.mask) * RECORD.size
+        )
+        if meta == 0 or checked ^ (value & WORD_MASK) ^ meta != key:
+            return None
+        depth, flag, move = _unpack_meta(meta)
+        return depth, value, flag, move
+
+    def store(self, key, depth, value, flag, move):
+        entry = self.pending.get(key)
+        if entry is None or depth >= entry[0]:
+            self.pending[key] = (depth, int(value), flag, move)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        self._lock()
+        try:
+            for key, (depth, value, flag, move) in self.pending.items():
+                offset = HEADER.size + (key & self.mask) * RECORD.size
+                # Depth-preferred, like the in-memory table: a shallower result
+                # never replaces a deeper one
+                _, _, stored_meta = RECORD.unpack_from(self.map, offset)
+                if stored_meta != 0 and stored_meta & 0xFF > depth:
+                    continue
+                meta = _pack_meta(depth, flag, move)
+                RECORD.pack_into(
+                    self.map, offset, key ^ (value & WORD_MASK) ^ meta, value, meta
+                )
+            self.map.flush()
+        finally:
+            self._unlock()
+        self.pending.clear()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.map.close()
+        self.file.close()
+
+
+def open_position_cache(path=POSITION_CACHE_PATH):
+    # The cache only speeds things up, so a location that cannot be written
+    # (a read-only install, say) means playing without one
+    try:
+        return PositionCache(path)
+    except OSError:
+        return None
@@ -0,0 +1,146 @@
+import argparse
+import json
+import math
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from config import PLAYER_PIECE, AI_PIECE, AI_WORKERS
+from ai import SearchContext, iterative_deepening, minimax, pick_best_move
+from bitboard import BitBoard
+from transposition import TranspositionTable
+
+# Smaller tables than the game's, since every worker holds two per game
+SELFPLAY_TT_SIZE_MB = 4
+
+
+def make_engine(spec):
+    # Engines are "random", "greedy", "minimax:<depth>" or "id:<seconds>"
+    name, _, arg = spec.partition(":")
+
+    if name == "random":
+        return lambda board, piece: random.choice(board.valid_moves())
+
+    if name == "greedy":
+        return pick_best_move
+
+    if name == "minimax":
+        depth = int(arg) if arg else 4
+        tt = TranspositionTable(SELFPLAY_TT_SIZE_MB)
+
+        def search(board, piece):
+            tt.new_search()
+            context = SearchContext(tt)
+            col, _ = minimax(
+                board, depth, -math.inf, math.inf, piece == AI_PIECE, context
+            )
+            return col
+
+        return search
+
+    if name == "id":
+        time_budget = float(arg) if arg else 0.1
+        tt = TranspositionTable(SELFPLAY_TT_SIZE_MB)
+
+        def search(board, piece):
+            col, _, _ = iterative_deepening(
+                board, time_budget, tt, maximizingPlayer=piece == AI_PIECE
+            )
+            return col
+
+        return search
+
+    raise ValueError(f"unknown engine {spec!r}")
+
+
+def play_game(game_id, engine_specs, seed):
+    # engine_specs[0] plays PLAYER_PIECE and engine_specs[1] AI_PIECE; the
+    # side that opens alternates between games
+    random.seed(seed + game_id)
+    engines = {
+        PLAYER_PIECE: make_engine(engine_specs[0]),
+        AI_PIECE: make_engine(engine_specs[1]),
+    }
+    first_piece = PLAYER_PIECE if game_id % 2 == 0 else AI_PIECE
+
+    board = BitBoard()
+    piece = first_piece
+    moves = []
+    move_times = []
+    winner = None
+
+    while not board.is_full():
+        start = time.perf_counter()
+        col = engines[piece](board, piece)
+        move_times.append(round(1000 * (time.perf_counter() - start), 3))
+
+        board.play(col, piece)
+        moves.append(col)
+        if board.is_win(piece):
+            winner = piece
+            break
+        piece = AI_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE
+
+    return {
+        "game": game_id,
+        "engines": {
+            str(PLAYER_PIECE): engine_specs[0],
+            str(AI_PIECE): engine_specs[1],
+        },
+        "first": first_piece,
+        "moves": moves,
+        "winner": engine_specs[winner - 1] if winner is not None else "draw",
+        "winner_piece": winner,
+        "move_times_ms": move_times,
+    }
+
+
+def _play_game(args):
+    return play_game(*args)
+
+
+def run_matches(engine_specs, games, output, workers=AI_WORKERS, seed=0):
+    # Games are written to output as JSON lines as soon as they finish
+    results = Counter()
+    start = time.perf_counter()
+    jobs = [(game_id, engine_specs, seed) for game_id in range(games)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for record in pool.map(_play_game, jobs, chunksize=4):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            results[str(record["winner_piece"] or "draw")] += 1
+
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Connect 4 engines headless")
+    parser.add_argument(
+        "--engines",
+        nargs=2,
+        default=["minimax:4", "greedy"],
+        metavar=("PLAYER1", "PLAYER2"),
+    )
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=AI_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="selfplay.jsonl")
+    args = parser.parse_args()
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        results, elapsed = run_matches(
+            args.engines, args.games, output, args.workers, args.seed
+        )
+
+    print(
+        f"{args.engines[0]}: {results[str(PLAYER_PIECE)]}  "
+        f"{args.engines[1]}: {results[str(AI_PIECE)]}  "
+        f"draws: {results['draw']}"
+    )
+    print(f"{args.games} games in {elapsed:.1f}s ({args.games / elapsed:.2f} games/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import random
+import time
+from config import (
+    ROW_COUNT,
+    COLUMN_COUNT,
+    WINDOW_LENGTH,
+    PLAYER_PIECE,
+    AI_PIECE,
+    SOLVER_TABLE_SIZE,
+)
+from ai import CENTER_ORDER, TIME_CHECK_INTERVAL, SearchTimeout
+from bitboard import (
+    BitBoard,
+    COLUMN_BITS,
+    can_win_next,
+    non_losing_moves,
+    possible_moves,
+    to_bitboard,
+    winning_cells,
+)
+
+CELL_COUNT = ROW_COUNT * COLUMN_COUNT
+
+# Scores follow the usual convention for solvers of this game: positive if
+# the side to move wins, larger the sooner it wins, zero for a draw. No side
+# can lose before the opponent has a full line on the board
+MIN_SCORE = -(CELL_COUNT // 2) + WINDOW_LENGTH - 1
+
+
+def score_to_outcome(score, moves):
+    # Turn a solver score into ("win" / "loss" / "draw", plies until the end)
+    if score == 0:
+        return "draw", CELL_COUNT - moves
+    # The score fixes the number of the winning disc up to one; the first
+    # player drops the odd-numbered discs, which settles it
+    last_move = CELL_COUNT + 2 - 2 * abs(score)
+    first_player_wins = (moves % 2 == 0) == (score > 0)
+    if last_move % 2 != first_player_wins:
+        last_move -= 1
+    return ("win" if score > 0 else "loss"), last_move - moves
+
+
+class Solver:
+    def __init__(self, table_size=SOLVER_TABLE_SIZE):
+        # Upper bounds keyed by current + mask, stored offset so 0 means empty
+        self.table_size = table_size
+        self.keys = [0] * table_size
+        self.values = [0] * table_size
+        self.nodes = 0
+        self.deadline = None
+        self.stop_event = None
+
+    def negamax(self, current, mask, moves, alpha, beta):
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchTimeout()
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+
+        possible = non_losing_moves(current, mask)
+        if possible == 0:
+            return -((CELL_COUNT - moves) // 2)
+        if moves >= CELL_COUNT - 2:
+            return 0
+
+        lower = -((CELL_COUNT - 2 - moves) // 2)
+        if alpha < lower:
+            alpha = lower
+            if alpha >= beta:
+                return alpha
+
+        upper = (CELL_COUNT - 1 - moves) // 2
+        key = current + mask
+        index = key % self.table_size
+        if self.keys[index] == key:
+            upper = self.values[index] + MIN_SCORE - 1
+        if beta > upper:
+            beta = upper
+            if alpha >= beta:
+                return beta
+
+        # Centre-first, then by how many winning cells the move creates
+        candidates = []
+        for col in CENTER_ORDER:
+            move = possible & COLUMN_BITS[col]
+            if move:
+                threats = winning_cells(current | move, mask).bit_count()
+                candidates.append((threats, move))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        opponent = current ^ mask
+        for _, move in candidates:
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.keys[index] = key
+        self.values[index] = alpha - MIN_SCORE + 1
+        return alpha
+
+    def solve(self, current, mask, moves):
+        if can_win_next(current, mask):
+            return (CELL_COUNT + 1 - moves) // 2
+
+        lower = -((CELL_COUNT - moves) // 2)
+        upper = (CELL_COUNT + 1 - moves) // 2
+        # Narrow the score with null-window searches, probing near zero first
+        while lower < upper:
+            middle = lower + (upper - lower) // 2
+            if middle <= 0 and int(lower / 2) < middle:
+                middle = int(lower / 2)
+            elif middle >= 0 and int(upper / 2) > middle:
+                middle = int(upper / 2)
+            result = self.negamax(current, mask, moves, middle, middle + 1)
+            if result <= middle:
+                upper = result
+            else:
+                lower = result
+        return lower
+
+    def analyze(self, board, piece):
+        board = to_bitboard(board)
+        current = board.masks[piece]
+        mask = board.masks[PLAYER_PIECE] | board.masks[AI_PIECE]
+        moves = board.move_count
+
+        scores = {}
+        for col in CENTER_ORDER:
+            if not board.can_play(col):
+                continue
+            move = possible_moves(mask) & COLUMN_BITS[col]
+            if winning_cells(current, mask) & move:
+                scores[col] = (CELL_COUNT + 1 - moves) // 2
+            else:
+                scores[col] = -self.solve(current ^ mask, mask | move, moves + 1)
+        return scores
+
+    def best_move(self, board, piece, time_budget=None, stop_event=None):
+        # Raises SearchTimeout if the position cannot be solved in time
+        self.deadline = None
+        if time_budget is not None:
+            self.deadline = time.perf_counter() + time_budget
+        self.stop_event = stop_event
+        self.nodes = 0
+
+        scores = self.analyze(board, piece)
+        # CENTER_ORDER insertion order makes max() prefer central columns on ties
+        col = max(scores, key=scores.get)
+        return col, scores[col]
+
+
+def random_position(rng, plies):
+    # A position reached by random play that is still undecided
+    while True:
+        board = BitBoard()
+        piece = PLAYER_PIECE
+        for _ in range(plies):
+            board.play(rng.choice(board.valid_moves()), piece)
+            if board.is_win(piece):
+                break
+            piece = AI_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE
+        else:
+            mask = board.masks[PLAYER_PIECE] | board.masks[AI_PIECE]
+            if not can_win_next(board.masks[piece], mask):
+                return board, piece
+
+
+def benchmark(phases, positions_per_phase, seed):
+    rng = random.Random(seed)
+    print(
+        f"{'plies':>5} {'positions':>9} {'mean ms':>10} "
+        f"{'max ms':>10} {'mean nodes':>11}"
+    )
+    for plies in phases:
+        times = []
+        nodes = []
+        for _ in range(positions_per_phase):
+            board, piece = random_position(rng, plies)
+            solver = Solver()
+            start = time.perf_counter()
+            solver.best_move(board, piece)
+            times.append(time.perf_counter() - start)
+            nodes.append(solver.nodes)
+        print(
+            f"{plies:>5} {len(times):>9} {1000 * sum(times) / len(times):>10.1f} "
+            f"{1000 * max(times):>10.1f} {sum(nodes) // len(nodes):>11}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Connect 4 solver")
+    parser.add_argument(
+        "--phases", type=int, nargs="+", default=[36, 30, 26, 22, 18, 14]
+    )
+    parser.add_argument("--positions", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.phases, args.positions, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+from config import TT_SIZE_MB, POSITION_CACHE_MIN_DEPTH
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Rough footprint of one slot: the list pointer plus a small tuple of ints
+ENTRY_BYTES = 128
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=TT_SIZE_MB, cache=None):
+        # Round the slot count down to a power of two so indexing is a mask
+        slots = max(1, size_mb * 1024 * 1024 // ENTRY_BYTES)
+        self.size = 1 << (slots.bit_length() - 1)
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+        self.generation = 0
+        # Optional PositionCache behind the table: misses fall through to it,
+        # and deep results are copied into it
+        self.cache = cache
+
+    def new_search(self):
+        self.generation += 1
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.generation = 0
+
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        if self.cache is not None:
+            cached = self.cache.probe(key)
+            if cached is not None:
+                return (key, *cached, self.generation)
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        index = key & self.mask
+        entry = self.entries[index]
+        # Depth-preferred replacement, but entries left over from an earlier
+        # search are always overwritten so the table does not fill with stale lines
+        if (
+            entry is None
+            or entry[0] == key
+            or entry[5] != self.generation
+            or depth >= entry[1]
+        ):
+            self.entries[index] = (key, depth, value, flag, move, self.generation)
+        if self.cache is not None and depth >= POSITION_CACHE_MIN_DEPTH:
+            self.cache.store(key, depth, value, flag, move)
+
+    def flush(self):
+        if self.cache is not None:
+            self.cache.flush()
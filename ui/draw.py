@@ -1,4 +1,6 @@
 import pygame
+import numpy as np
+from ui.fonts import get_font
 from config import (
     BLUE,
     BLACK,
@@ -13,7 +15,6 @@ from config import (
     ROW_COUNT,
     COLUMN_COUNT,
     PLAYER_PIECE,
-    AI_PIECE,
     WIDTH,
     HEIGHT,
     TITLE_FONT,
@@ -24,61 +25,100 @@ from config import (
 )
 
 
-def draw_board(board, screen):
+# The strip above the board holding names, timers and the hover disc
+HEADER_RECT = pygame.Rect(0, 0, WIDTH, SQUARESIZE * 2)
+# The board and the pause hint below it
+BOARD_RECT = pygame.Rect(0, SQUARESIZE * 2, WIDTH, int(HEIGHT) - SQUARESIZE * 2)
+
+# The empty board with its pause hint, drawn once and blitted from then on
+_board_frame = None
+
+
+def get_board_frame():
+    global _board_frame
+    if _board_frame is not None:
+        return _board_frame
+
+    frame = pygame.Surface(BOARD_RECT.size)
+    frame.fill(BLACK)
     for c in range(COLUMN_COUNT):
         for r in range(ROW_COUNT):
             pygame.draw.rect(
-                screen,
-                BLUE,
-                (
-                    c * SQUARESIZE,
-                    r * SQUARESIZE + SQUARESIZE * 2,
-                    SQUARESIZE,
-                    SQUARESIZE,
-                ),
+                frame, BLUE, (c * SQUARESIZE, r * SQUARESIZE, SQUARESIZE, SQUARESIZE)
             )
             pygame.draw.circle(
-                screen,
+                frame,
                 BLACK,
                 (
                     int(c * SQUARESIZE + SQUARESIZE / 2),
-                    int(r * SQUARESIZE + SQUARESIZE * 2 + SQUARESIZE / 2),
+                    int(r * SQUARESIZE + SQUARESIZE / 2),
                 ),
                 RADIUS,
             )
 
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT):
-            if board[r][c] == PLAYER_PIECE:
-                pygame.draw.circle(
-                    screen,
-                    RED,
-                    (
-                        int(c * SQUARESIZE + SQUARESIZE / 2),
-                        int((ROW_COUNT - r) * SQUARESIZE + SQUARESIZE * 1.5),
-                    ),
-                    RADIUS,
-                )
-            elif board[r][c] == AI_PIECE:
-                pygame.draw.circle(
-                    screen,
-                    YELLOW,
-                    (
-                        int(c * SQUARESIZE + SQUARESIZE / 2),
-                        int((ROW_COUNT - r) * SQUARESIZE + SQUARESIZE * 1.5),
-                    ),
-                    RADIUS,
-                )
-
-    pause_hint = PAUSE_HINT_FONT.render("Press 'Esc' to pause the game", 1, ORANGE)
-    screen.blit(
+    pause_hint = get_font(PAUSE_HINT_FONT).render(
+        "Press 'Esc' to pause the game", 1, ORANGE
+    )
+    frame.blit(
         pause_hint,
         (
             WIDTH / 2 - pause_hint.get_width() / 2,
-            HEIGHT - SQUARESIZE / 3 - pause_hint.get_height() / 3,
+            HEIGHT - SQUARESIZE / 3 - pause_hint.get_height() / 3 - BOARD_RECT.top,
         ),
     )
 
+    # Match the display's pixel format so blits need no conversion
+    if pygame.display.get_surface() is not None:
+        frame = frame.convert()
+    _board_frame = frame
+    return frame
+
+
+def cell_rect(row, col):
+    return pygame.Rect(
+        col * SQUARESIZE, (ROW_COUNT + 1 - row) * SQUARESIZE, SQUARESIZE, SQUARESIZE
+    )
+
+
+def draw_piece(screen, row, col, piece):
+    # Draw one disc over its hole and return the area that changed
+    pygame.draw.circle(
+        screen,
+        RED if piece == PLAYER_PIECE else YELLOW,
+        (
+            int(col * SQUARESIZE + SQUARESIZE / 2),
+            int((ROW_COUNT - row) * SQUARESIZE + SQUARESIZE * 1.5),
+        ),
+        RADIUS,
+    )
+    return cell_rect(row, col)
+
+
+def draw_board(board, screen):
+    # Full repaint of the board area; after a move only draw_piece is needed
+    screen.blit(get_board_frame(), BOARD_RECT)
+    for r, c in zip(*np.nonzero(board)):
+        draw_piece(screen, r, c, board[r][c])
+    return BOARD_RECT
+
+
+def draw_winning_window(screen, cells):
+    # Ring the discs of the completed line
+    rects = []
+    for r, c in cells:
+        pygame.draw.circle(
+            screen,
+            WHITE,
+            (
+                int(c * SQUARESIZE + SQUARESIZE / 2),
+                int((ROW_COUNT - r) * SQUARESIZE + SQUARESIZE * 1.5),
+            ),
+            RADIUS,
+            5,
+        )
+        rects.append(cell_rect(r, c))
+    return rects
+
 
 def display_timer(screen, player_time, current_player):
     minutes1 = int(player_time[0] // 60)
@@ -93,8 +133,9 @@ def display_timer(screen, player_time, current_player):
         time1_color = GRAY
         time2_color = YELLOW
 
-    time1_text = TIMER_FONT.render(f"{minutes1:02d}:{seconds1:02d}", 1, time1_color)
-    time2_text = TIMER_FONT.render(f"{minutes2:02d}:{seconds2:02d}", 1, time2_color)
+    timer_font = get_font(TIMER_FONT)
+    time1_text = timer_font.render(f"{minutes1:02d}:{seconds1:02d}", 1, time1_color)
+    time2_text = timer_font.render(f"{minutes2:02d}:{seconds2:02d}", 1, time2_color)
 
     screen.blit(time1_text, (WIDTH // 4 - time1_text.get_width() // 2, 40))
     screen.blit(time2_text, (3 * WIDTH // 4 - time2_text.get_width() // 2, 40))
@@ -112,7 +153,7 @@ def draw_pause_menu(screen):
     overlay.fill((0, 0, 0, 180))
     screen.blit(overlay, (0, 0))
 
-    title = TITLE_FONT.render("GAME PAUSED", 1, WHITE)
+    title = get_font(TITLE_FONT).render("GAME PAUSED", 1, WHITE)
     screen.blit(title, (WIDTH / 2 - title.get_width() / 2, HEIGHT / 4 - 40))
 
     button_width = 400
@@ -123,24 +164,24 @@ def draw_pause_menu(screen):
         button_x, HEIGHT / 2 - 30, button_width, button_height
     )
     pygame.draw.rect(screen, GREEN, continue_button)
-    continue_text = MENU_FONT.render("Continue", 1, WHITE)
+    continue_text = get_font(MENU_FONT).render("Continue", 1, WHITE)
     screen.blit(
         continue_text, (WIDTH / 2 - continue_text.get_width() / 2, HEIGHT / 2 - 15)
     )
 
     restart_button = pygame.Rect(button_x, HEIGHT / 2 + 60, button_width, button_height)
     pygame.draw.rect(screen, BLUE, restart_button)
-    restart_text = MENU_FONT.render("Restart", 1, WHITE)
+    restart_text = get_font(MENU_FONT).render("Restart", 1, WHITE)
     screen.blit(
         restart_text, (WIDTH / 2 - restart_text.get_width() / 2, HEIGHT / 2 + 75)
     )
 
     menu_button = pygame.Rect(button_x, HEIGHT / 2 + 150, button_width, button_height)
     pygame.draw.rect(screen, RED, menu_button)
-    menu_text = MENU_FONT.render("Return to Main Menu", 1, WHITE)
+    menu_text = get_font(MENU_FONT).render("Return to Main Menu", 1, WHITE)
     screen.blit(menu_text, (WIDTH / 2 - menu_text.get_width() / 2, HEIGHT / 2 + 165))
 
-    hint_text = INFO_FONT.render("Press 'Esc' again to continue", 1, WHITE)
+    hint_text = get_font(INFO_FONT).render("Press 'Esc' again to continue", 1, WHITE)
     screen.blit(hint_text, (WIDTH / 2 - hint_text.get_width() / 2, HEIGHT * 3 / 4 + 50))
 
     pygame.display.update()
@@ -0,0 +1,14 @@
+import pygame
+
+# Fonts are created the first time they are drawn with and then reused
+_fonts = {}
+
+
+def get_font(spec):
+    # spec is a (family, size) pair from config
+    font = _fonts.get(spec)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[spec] = pygame.font.SysFont(*spec)
+    return font
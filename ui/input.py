@@ -1,5 +1,6 @@
 import pygame
 import sys
+from ui.fonts import get_font
 from config import (
     BLACK,
     WHITE,
@@ -12,16 +13,17 @@ from config import (
     EASY,
     MEDIUM,
     HARD,
+    PERFECT,
 )
 
 
 def get_player_names(screen):
     screen.fill(BLACK)
-    title = INPUT_FONT.render("Enter Player Names", 1, WHITE)
+    title = get_font(INPUT_FONT).render("Enter Player Names", 1, WHITE)
     screen.blit(title, (WIDTH / 2 - title.get_width() / 2, 50))
 
-    player1_text = INFO_FONT.render("Player 1:", 1, RED)
-    player2_text = INFO_FONT.render("Player 2:", 1, YELLOW)
+    player1_text = get_font(INFO_FONT).render("Player 1:", 1, RED)
+    player2_text = get_font(INFO_FONT).render("Player 2:", 1, YELLOW)
 
     screen.blit(player1_text, (WIDTH / 2 - 220, 150))
     screen.blit(player2_text, (WIDTH / 2 - 220, 250))
@@ -34,15 +36,15 @@ def get_player_names(screen):
 
     continue_button = pygame.Rect(WIDTH / 2 - 100, 350, 200, 50)
     pygame.draw.rect(screen, GREEN, continue_button)
-    continue_text = INFO_FONT.render("Continue", 1, WHITE)
+    continue_text = get_font(INFO_FONT).render("Continue", 1, WHITE)
     screen.blit(continue_text, (WIDTH / 2 - continue_text.get_width() / 2, 365))
 
     player1_name = "Player 1"
     player2_name = "Player 2"
     active_input = None
 
-    name1_surface = INPUT_FONT.render(player1_name, 1, WHITE)
-    name2_surface = INPUT_FONT.render(player2_name, 1, WHITE)
+    name1_surface = get_font(INPUT_FONT).render(player1_name, 1, WHITE)
+    name2_surface = get_font(INPUT_FONT).render(player2_name, 1, WHITE)
     screen.blit(name1_surface, (player1_box.x + 10, player1_box.y + 5))
     screen.blit(name2_surface, (player2_box.x + 10, player2_box.y + 5))
 
@@ -112,8 +114,8 @@ def get_player_names(screen):
             pygame.draw.rect(screen, WHITE, player1_box, 2)
             pygame.draw.rect(screen, WHITE, player2_box, 2)
 
-        name1_surface = INPUT_FONT.render(player1_name, 1, WHITE)
-        name2_surface = INPUT_FONT.render(player2_name, 1, WHITE)
+        name1_surface = get_font(INPUT_FONT).render(player1_name, 1, WHITE)
+        name2_surface = get_font(INPUT_FONT).render(player2_name, 1, WHITE)
         screen.blit(name1_surface, (player1_box.x + 10, player1_box.y + 5))
         screen.blit(name2_surface, (player2_box.x + 10, player2_box.y + 5))
 
@@ -125,10 +127,11 @@ def get_difficulty(screen):
         "Easy": EASY,
         "Medium": MEDIUM,
         "Hard": HARD,
+        "Perfect": PERFECT,
     }
 
     screen.fill(BLACK)
-    title = INPUT_FONT.render("Select Difficulty", 1, WHITE)
+    title = get_font(INPUT_FONT).render("Select Difficulty", 1, WHITE)
     screen.blit(title, (WIDTH / 2 - title.get_width() / 2, 50))
 
     button_height = 70
@@ -142,7 +145,7 @@ def get_difficulty(screen):
         buttons[diff] = pygame.Rect(button_x, y_pos, button_width, button_height)
         pygame.draw.rect(screen, GREEN, buttons[diff])
 
-        diff_text = INPUT_FONT.render(diff, 1, WHITE)
+        diff_text = get_font(INPUT_FONT).render(diff, 1, WHITE)
         screen.blit(
             diff_text,
             (
@@ -1,5 +1,6 @@
 import pygame
 import sys
+from ui.fonts import get_font
 from config import (
     BLACK,
     WHITE,
@@ -15,7 +16,7 @@ from config import (
 
 def draw_main_menu(screen):
     screen.fill(BLACK)
-    title = TITLE_FONT.render("Connect 4", 1, WHITE)
+    title = get_font(TITLE_FONT).render("Connect 4", 1, WHITE)
     screen.blit(title, (WIDTH / 2 - title.get_width() / 2, 50))
 
     pvp_button = pygame.Rect(WIDTH / 2 - 150, 250, 300, 80)
@@ -28,10 +29,10 @@ def draw_main_menu(screen):
     pygame.draw.rect(screen, GREEN, about_button)
     pygame.draw.rect(screen, RED, quit_button)
 
-    pvp_text = MENU_FONT.render("Player vs Player", 1, WHITE)
-    pvai_text = MENU_FONT.render("Player vs AI", 1, WHITE)
-    about_text = MENU_FONT.render("About", 1, WHITE)
-    quit_text = MENU_FONT.render("Quit", 1, WHITE)
+    pvp_text = get_font(MENU_FONT).render("Player vs Player", 1, WHITE)
+    pvai_text = get_font(MENU_FONT).render("Player vs AI", 1, WHITE)
+    about_text = get_font(MENU_FONT).render("About", 1, WHITE)
+    quit_text = get_font(MENU_FONT).render("Quit", 1, WHITE)
 
     screen.blit(pvp_text, (WIDTH / 2 - pvp_text.get_width() / 2, 275))
     screen.blit(pvai_text, (WIDTH / 2 - pvai_text.get_width() / 2, 375))
@@ -44,7 +45,7 @@ def draw_main_menu(screen):
 
 def show_about(screen):
     screen.fill(BLACK)
-    title = TITLE_FONT.render("About Connect 4", 1, WHITE)
+    title = get_font(TITLE_FONT).render("About Connect 4", 1, WHITE)
     screen.blit(title, (WIDTH / 2 - title.get_width() / 2, 50))
 
     try:
@@ -70,13 +71,13 @@ def show_about(screen):
 
     y_pos = 120
     for line in info_lines:
-        text = INFO_FONT.render(line, 1, WHITE)
+        text = get_font(INFO_FONT).render(line, 1, WHITE)
         screen.blit(text, (WIDTH / 2 - text.get_width() / 2, y_pos))
         y_pos += 30
 
     back_button = pygame.Rect(WIDTH / 2 - 100, 600, 200, 50)
     pygame.draw.rect(screen, BLUE, back_button)
-    back_text = INFO_FONT.render("Back to Menu", 1, WHITE)
+    back_text = get_font(INFO_FONT).render("Back to Menu", 1, WHITE)
     screen.blit(back_text, (WIDTH / 2 - back_text.get_width() / 2, 615))
 
     pygame.display.update()